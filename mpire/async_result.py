@@ -169,6 +169,36 @@ class UnorderedAsyncResultIterator:
 
     __next__ = next
 
+    def next_batch(self, block: bool = True, timeout: Optional[float] = None) -> List[Any]:
+        """
+        Obtain all unordered results for the task that are currently available. Unlike ``next``, this doesn't raise
+        ``queue.Empty`` when no results are available, but returns an empty list instead. This avoids raising an
+        exception each time the timeout is exceeded, which happens frequently when polling for results
+
+        :param block: If True, wait until the next result is available. If False, return right away
+        :param timeout: Timeout in seconds. If None, wait indefinitely
+        :return: List of results. Empty when the timeout is exceeded or when the task failed
+        """
+        if not self._items:
+            if self._n_tasks is not None and self._n_returned == self._n_tasks:
+                raise StopIteration
+
+            if not block:
+                return []
+
+            # We still expect results. Wait until the next result is available or the task failed
+            with self._condition:
+                while not self._items:
+                    if self._got_exception.is_set() or not self._condition.wait(timeout=timeout):
+                        return []
+                    if self._n_tasks is not None and self._n_returned == self._n_tasks:
+                        raise StopIteration
+
+        # Results can be added while we're popping them, so we only pop the ones that are there right now
+        batch = [self._items.popleft() for _ in range(len(self._items))]
+        self._n_returned += len(batch)
+        return batch
+
     def wait(self) -> None:
         """
         Wait until all results are available
@@ -191,8 +221,23 @@ class UnorderedAsyncResultIterator:
             with self._condition:
                 self._condition.notify()
         else:
+            # Wake up anyone waiting for the next batch of results, such that the exception can be handled right away
             self._exception = result
             self._got_exception.set()
+            with self._condition:
+                self._condition.notify_all()
+
+    def _set_batch(self, results: List[Any]) -> None:
+        """
+        Set the results of multiple tasks that have finished successfully. Compared to calling ``_set`` for each result,
+        the iterator only needs to be notified once
+
+        :param results: Outputs of the function
+        """
+        self._n_received += len(results)
+        self._items.extend(results)
+        with self._condition:
+            self._condition.notify()
 
     def set_length(self, length: int) -> None:
         """
@@ -1,6 +1,8 @@
 import collections
 import ctypes
+import itertools
 import multiprocessing as mp
+import multiprocessing.connection
 import queue
 import threading
 import time
@@ -23,12 +25,18 @@ NEW_MAP_PARAMS_PILL = '\2'
 # need to be processed slightly differently
 APPLY_PILL = '\3'
 
+
 # Fixed job IDs for the main process, worker_init, and worker_exit functions
 MAIN_PROCESS = -1
 INIT_FUNC = -2
 EXIT_FUNC = -3
 
 
+class TaskBatch(list):
+
+    """ Multiple chunks of tasks that are added to the task queue of a worker at once """
+
+
 class WorkerComms:
 
     """
@@ -43,12 +51,19 @@ class WorkerComms:
     
     General overview of how the comms work:
     - When ``map`` or ``imap`` is used, the workers need to return the ``idx`` of the task they just completed. This is
-        needed to return the results in order. This is communicated by using the ``_keep_order`` boolean value.
+        needed to return the results in order. The main process keeps track of this using the ``_keep_order`` boolean.
+        Each chunk of tasks is tagged with the index of its first task when order needs to be kept, or ``None``
+        otherwise. This way, workers don't need any shared state to know whether to keep order in mind.
     - The main process assigns tasks to the workers by using their respective task queue (``_task_queues``). When no
         tasks have been completed yet, the main process assigns tasks in order. To determine which worker to assign the
         next task to, the main process uses the ``_task_idx`` counter. When tasks have been completed, the main process
         assigns the next task to the worker that completed the last task. This is communicated by using the
         ``_last_completed_task_worker_id`` deque.
+    - To reduce the number of queue operations, the main process can buffer the chunks of tasks for a worker in
+        ``_task_buffers`` and add them to the task queue at once as a ``TaskBatch``. A worker stores the chunks of a
+        batch in ``_task_batches`` and processes them one by one. As a batch is a single item in the task queue,
+        ``task_done`` is only passed on to the queue for the last chunk of a batch. ``_n_task_done_skip`` keeps track of
+        how many ``task_done`` calls should be skipped.
     - Each worker keeps track of whether it is running a task by using the ``_worker_running_task`` boolean value. This
         is used by the main process in case a worker needs to be interrupted (due to an exception somewhere else). 
         When a worker is not busy with any task at the moment, the worker will exit itself because of the 
@@ -58,10 +73,17 @@ class WorkerComms:
         doing something in between.
     - Each worker also keeps track of which job it is working on by using the ``_worker_working_on_job`` array. This is
         needed to assess whether a certain task times out, and we need to know which job to set to failed.
-    - The workers communicate their results to the main process by using the results queue (``_results_queue``). Each
-        worker keeps track of how many results it has added to the queue (``_results_added``), and the main process 
-        keeps track of how many results it has received from each worker (``_results_received``). This is used by the
-        workers to know when they can safely exit.
+    - The workers communicate their results to the main process by using the results pipes (``_results_readers`` and
+        ``_results_writers``). Each worker has its own pipe, so workers never have to wait for each other when sending
+        results. Workers pickle their results first and then write them to their pipe. The main process waits for any
+        of the pipes to become readable and reads from them while holding the ``_results_read_lock``. The main process
+        itself uses a separate pipe (``_main_results_reader`` and ``_main_results_writer``) to stop the results
+        listener. Each worker keeps track of how many results it has added to its pipe (``_results_added``), and the
+        main process keeps track of how many results it has received from each worker (``_results_received``). This is
+        used by the workers to know when they can safely exit, and by the main process to know when all results are in.
+        Workers can send the results of multiple chunks of tasks at once, so each batch of results is accompanied by the
+        number of chunks it contains. The main process uses this number to determine how many new tasks the worker can
+        receive.
     - Workers can request a restart when a maximum lifespan is configured and reached. This is done by setting the
         ``_worker_restart_array`` boolean array. The main process listens to this array and restarts the worker when
         needed. The ``_worker_restart_condition`` is used to signal the main process that a worker needs to be 
@@ -87,6 +109,9 @@ class WorkerComms:
     # Amount of time in between each progress bar update
     progress_bar_update_interval = 0.1
 
+    # Maximum number of chunks of tasks to buffer for a worker before adding them to its task queue
+    task_buffer_max_chunks = 8
+
     def __init__(self, ctx: mp.context.BaseContext, n_jobs: int, order_tasks: bool) -> None:
         """
         :param ctx: Multiprocessing context
@@ -99,8 +124,8 @@ class WorkerComms:
         self.order_tasks = order_tasks
         self._initialized = False
 
-        # Whether or not to inform the child processes to keep order in mind (for the map functions)
-        self._keep_order = self.ctx.Value(ctypes.c_bool, False, lock=True)
+        # Whether or not to tag chunks of tasks such that the child processes keep order in mind (for the map functions)
+        self._keep_order = False
 
         # Queue to pass on tasks to child processes. We keep track of which worker completed the last task and which
         # worker is working on what task
@@ -110,11 +135,24 @@ class WorkerComms:
         self._last_completed_task_worker_id = collections.deque()
         self._worker_working_on_job: Optional[mp.Array] = None
 
-        # Queue where the child processes can pass on results, and counters to keep track of how many results have been
-        # added and received per worker. results_added is a simple list of integers which is only accessed by the worker
-        # itself
-        self._results_queue: Optional[mp.JoinableQueue] = None
-        self._results_added: List[int] = []
+        # Buffers of tasks that still need to be added to the task queues (used by the main process) and batches of
+        # tasks that have been received, but not processed yet (used by the workers)
+        self._task_buffers: List[List[Tuple[int, Any]]] = []
+        self._task_batches: List[collections.deque] = []
+        self._n_task_done_skip: List[int] = []
+
+        # Pipes where the child processes can pass on results, and counters to keep track of how many results have
+        # been added and received per worker. A pipe doesn't need a feeder thread like a queue does, so sending results
+        # is done directly by the worker. Each worker has its own pipe, such that workers don't have to compete for a
+        # write lock. The main process has its own pipe as well. Readers that are ready to be read from are stored, so
+        # we can read from them in a round-robin fashion
+        self._results_readers: List[mp.connection.Connection] = []
+        self._results_writers: List[mp.connection.Connection] = []
+        self._main_results_reader: Optional[mp.connection.Connection] = None
+        self._main_results_writer: Optional[mp.connection.Connection] = None
+        self._results_read_lock: Optional[mp.Lock] = None
+        self._results_readers_ready = collections.deque()
+        self._results_added: Optional[mp.Array] = None
         self._results_received: Optional[mp.Array] = None
 
         # Array where the child processes can request a restart
@@ -173,10 +211,16 @@ class WorkerComms:
             self.ctx.Value(ctypes.c_bool, False, lock=self.ctx.RLock()) for _ in range(self.n_jobs)
         ]
         self._worker_working_on_job = self.ctx.Array('i', self.n_jobs, lock=True)
-
-        # Results related
-        self._results_queue = self.ctx.JoinableQueue()
-        self._results_added = [0 for _ in range(self.n_jobs)]
+        self._task_batches = [collections.deque() for _ in range(self.n_jobs)]
+        self._n_task_done_skip = [0] * self.n_jobs
+
+        # Results related. results_added is only written to by the worker itself, so it doesn't need a lock
+        self._results_readers, self._results_writers = zip(*(self.ctx.Pipe(duplex=False) for _ in range(self.n_jobs)))
+        self._results_readers, self._results_writers = list(self._results_readers), list(self._results_writers)
+        self._main_results_reader, self._main_results_writer = self.ctx.Pipe(duplex=False)
+        self._results_read_lock = self.ctx.Lock()
+        self._results_readers_ready.clear()
+        self._results_added = self.ctx.Array('L', self.n_jobs, lock=False)
         self._results_received = self.ctx.Array('L', self.n_jobs, lock=self.ctx.RLock())
 
         # Worker status
@@ -201,10 +245,11 @@ class WorkerComms:
 
     def reset_progress(self) -> None:
         """
-        Resets the task_idx and last_completed_task_worker_id
+        Resets the task_idx, last_completed_task_worker_id, and the task buffers
         """
         self._task_idx = 0
         self._last_completed_task_worker_id.clear()
+        self._task_buffers = [[] for _ in range(self.n_jobs)]
         self._tasks_completed_array[:] = [0] * self.n_jobs
         self.clear_progress_bar_shutdown()
         self.clear_progress_bar_complete()
@@ -301,19 +346,19 @@ class WorkerComms:
         """
         Set that we need to keep order in mind
         """
-        self._keep_order.value = True
+        self._keep_order = True
 
     def clear_keep_order(self) -> None:
         """
         Forget that we need to keep order in mind
         """
-        self._keep_order.value = False
+        self._keep_order = False
 
     def keep_order(self) -> bool:
         """
         :return: Whether we need to keep order in mind
         """
-        return self._keep_order.value
+        return self._keep_order
 
     ################
     # Tasks & results
@@ -332,6 +377,41 @@ class WorkerComms:
             task = (job_id, task) if job_id is not None else task
             self._task_queues[worker_id].put(task, block=True)
 
+    def buffer_task(self, job_id: int, task: Any) -> None:
+        """
+        Add a task to the buffer of the worker that should process it. The buffered tasks of a worker are added to its
+        task queue at once, when the buffer is full. Use ``flush_task_buffers`` to add the remaining buffered tasks to
+        the task queues, e.g., before waiting for results.
+
+        :param job_id: Job ID
+        :param task: A tuple of arguments to pass to a worker, which acts upon it
+        """
+        worker_id = self._get_task_worker_id()
+        task_buffer = self._task_buffers[worker_id]
+        task_buffer.append((job_id, task))
+        if len(task_buffer) >= self.task_buffer_max_chunks:
+            self._flush_task_buffer(worker_id)
+
+    def flush_task_buffers(self) -> None:
+        """
+        Add all buffered tasks to the task queues
+        """
+        for worker_id in range(self.n_jobs):
+            self._flush_task_buffer(worker_id)
+
+    def _flush_task_buffer(self, worker_id: int) -> None:
+        """
+        Add the buffered tasks of a worker to its task queue. Multiple tasks are added as a single ``TaskBatch``
+
+        :param worker_id: Worker ID
+        """
+        task_buffer = self._task_buffers[worker_id]
+        if task_buffer:
+            with DelayedKeyboardInterrupt():
+                self._task_queues[worker_id].put(task_buffer[0] if len(task_buffer) == 1 else TaskBatch(task_buffer),
+                                                 block=True)
+            self._task_buffers[worker_id] = []
+
     def add_apply_task(self, job_id: int, func: Callable, args: Tuple = (), kwargs: Dict = None):
         """
         Add a task to the queue so a worker can process it. First though, add an APPLY_PILL such that the worker knows
@@ -375,20 +455,45 @@ class WorkerComms:
         :param worker_id: Worker ID
         :return: Chunk of tasks or None when an exception was thrown
         """
+        task_batch = self._task_batches[worker_id]
+        if task_batch:
+            return task_batch.popleft()
+
         while not self.exception_thrown():
             try:
-                return self._task_queues[worker_id].get(block=True, timeout=0.01)
+                task = self._task_queues[worker_id].get(block=True, timeout=0.01)
             except queue.Empty:
-                pass
+                continue
+
+            # The remaining chunks of a batch are returned one by one by subsequent calls. The batch is a single item
+            # in the queue, so only the last task_done call should be passed on to the queue
+            if type(task) is TaskBatch:
+                task_batch.extend(task[1:])
+                self._n_task_done_skip[worker_id] += len(task) - 1
+                return task[0]
+            return task
         return None
 
+    def task_available(self, worker_id: int) -> bool:
+        """
+        Check whether a new chunk of tasks is readily available for a worker. Note that this is only an indication, as
+        the main process can add new tasks at any time.
+
+        :param worker_id: Worker ID
+        :return: Whether a new chunk of tasks is available
+        """
+        return bool(self._task_batches[worker_id]) or not self._task_queues[worker_id].empty()
+
     def task_done(self, worker_id: int) -> None:
         """
         Signal that we've completed a task
 
         :param worker_id: Worker ID
         """
-        self._task_queues[worker_id].task_done()
+        if self._n_task_done_skip[worker_id]:
+            self._n_task_done_skip[worker_id] -= 1
+        else:
+            self._task_queues[worker_id].task_done()
 
     def set_worker_running_task(self, worker_id: int, running: bool) -> None:
         """
@@ -435,33 +540,57 @@ class WorkerComms:
         """
         return self._worker_working_on_job[worker_id]
 
-    def add_results(self, worker_id: Optional[int], results: List[Tuple[Optional[int], bool, Any]]) -> None:
+    def add_results(self, worker_id: Optional[int], results: List[Tuple[Optional[int], bool, Any]],
+                    n_chunks: int = 1) -> None:
         """
-        Add results to the results queue
+        Add results to the results pipe of the worker. When no worker ID is given, the results are added to the results
+        pipe of the main process
 
         :param worker_id: Worker ID
         :param results: A list of tuples of job ID, success bool, and output from the worker
+        :param n_chunks: Number of chunks of tasks the results correspond to
         """
+        writer = self._main_results_writer if worker_id is None else self._results_writers[worker_id]
+        writer.send_bytes(self.ctx.reducer.ForkingPickler.dumps((worker_id, n_chunks, results)))
         if worker_id is not None:
             self._results_added[worker_id] += 1
-        self._results_queue.put((worker_id, results))
 
     def get_results(self, block: bool = True, timeout: Optional[float] = None) -> Any:
         """
-        Obtain the next result from the results queue
+        Obtain the next result from the results pipes. When multiple pipes are ready to be read from, they are read from
+        in a round-robin fashion
 
         :param block: Whether to block (wait for results)
         :param timeout: How long to wait for results in case ``block==True``
-        :return: The next result from the queue, which is the result of calling the function
+        :return: The next result from the pipe, which is the result of calling the function
+        :raises queue.Empty: When no results are available (within the timeout)
         """
+        deadline = time.time() + timeout if block and timeout is not None else None
         try:
             with DelayedKeyboardInterrupt():
-                worker_id, results = self._results_queue.get(block=block, timeout=timeout)
-                self._results_queue.task_done()
+                # Similar to multiprocessing.Queue.get(), we hold the read lock while waiting for results. The threading
+                # Lock object doesn't accept timeout=None, so we only pass it on when it's set
+                if not (self._results_read_lock.acquire(block, timeout) if deadline is not None else
+                        self._results_read_lock.acquire(block)):
+                    raise queue.Empty
+                try:
+                    if not self._results_readers_ready:
+                        if deadline is not None:
+                            wait_timeout = max(0.0, deadline - time.time())
+                        else:
+                            wait_timeout = None if block else 0.0
+                        self._results_readers_ready.extend(mp.connection.wait(
+                            self._results_readers + [self._main_results_reader], timeout=wait_timeout
+                        ))
+                        if not self._results_readers_ready:
+                            raise queue.Empty
+                    worker_id, n_chunks, results = self._results_readers_ready.popleft().recv()
+                finally:
+                    self._results_read_lock.release()
                 if worker_id is not None:
                     with self._results_received.get_lock():
                         self._results_received[worker_id] += 1
-                    self._last_completed_task_worker_id.append(worker_id)
+                    self._last_completed_task_worker_id.extend(itertools.repeat(worker_id, n_chunks))
                 return results
         except EOFError:
             # This can occur when an imap function was running, while at the same time terminate() was called
@@ -469,10 +598,11 @@ class WorkerComms:
 
     def reset_results_received(self, worker_id: int) -> None:
         """
-        Reset the number of results received from a worker
+        Reset the number of results added and received for a worker
 
         :param worker_id: Worker ID
         """
+        self._results_added[worker_id] = 0
         self._results_received[worker_id] = 0
 
     def wait_for_all_results_received(self, worker_id: int) -> None:
@@ -484,6 +614,16 @@ class WorkerComms:
         while self._results_received[worker_id] != self._results_added[worker_id]:
             time.sleep(0.01)
 
+    def wait_until_all_results_received(self) -> None:
+        """
+        Wait until the main process has received all the results the workers have added to the results pipes. Stops
+        waiting when an exception has been thrown
+        """
+        while not self.exception_thrown() and any(
+            n_received != n_added for n_received, n_added in zip(self._results_received, self._results_added)
+        ):
+            time.sleep(0.01)
+
     def add_new_map_params(self, map_params: WorkerMapParams) -> None:
         """
         Submits new map params for each worker
@@ -636,16 +776,15 @@ class WorkerComms:
         """
         return not self._workers_dead[worker_id]
 
-    def join_results_queues(self, keep_alive: bool = False) -> None:
+    def close_results_pipes(self) -> None:
         """
-        Join results and exit results queues
-
-        :param keep_alive: Whether to keep the queues alive
+        Close both ends of the results pipes
         """
-        self._results_queue.join()
-        if not keep_alive:
-            self._results_queue.close()
-            self._results_queue.join_thread()
+        for connection in itertools.chain(self._results_readers, self._results_writers,
+                                          (self._main_results_reader, self._main_results_writer)):
+            if connection is not None:
+                connection.close()
+        self._results_readers_ready.clear()
 
     def join_task_queues(self, keep_alive: bool = False) -> None:
         """
@@ -660,13 +799,13 @@ class WorkerComms:
 
     def drain_results_queue_terminate_worker(self, dont_wait_event: threading.Event) -> None:
         """
-        Drain the results queue without blocking. This is done when terminating workers, while they could still be busy
-        putting something in the queues. This function will always be called from within a thread.
+        Drain the results pipes without blocking. This is done when terminating workers, while they could still be busy
+        putting something in the pipes. This function will always be called from within a thread.
 
         :param dont_wait_event: Event object to indicate whether other termination threads should continue. I.e., when
             we set it to False, threads should wait.
         """
-        # Get results from the results queue. If we got any, keep going and inform the other termination threads to wait
+        # Get results from the results pipes. If we got any, keep going and inform the other termination threads to wait
         # until this one's finished
         got_results = False
         try:
@@ -680,10 +819,11 @@ class WorkerComms:
 
     def drain_queues(self) -> None:
         """
-        Drain tasks and results queues
+        Drain tasks queues and close the results pipes. Unlike a queue, a pipe doesn't have a feeder thread that needs
+        to be flushed, so there's no need to drain it
         """
         [self.drain_and_join_queue(q) for q in self._task_queues]
-        self.drain_and_join_queue(self._results_queue)
+        self.close_results_pipes()
 
     def drain_and_join_queue(self, q: mp.JoinableQueue, join: bool = True) -> None:
         """
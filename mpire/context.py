@@ -2,6 +2,7 @@ import multiprocessing as mp
 try:
     import multiprocess as mp_dill
     import multiprocess.managers  # Needed in utils.py
+    import multiprocess.shared_memory  # Needed in utils.py
 except ImportError:
     mp_dill = None
 import platform
@@ -29,12 +30,14 @@ class ThreadingContext:
     RLock = threading.RLock
     Thread = threading.Thread
 
-    # threading doesn't have Array and JoinableQueue, so we take it from multiprocessing. Both are thread-safe. We need
-    # the Process class for the MPIRE insights SyncManager instance.
+    # threading doesn't have Array, JoinableQueue, and Pipe, so we take it from multiprocessing. These are thread-safe.
+    # We need the Process class for the MPIRE insights SyncManager instance.
     Array = mp.Array
     JoinableQueue = mp.JoinableQueue
+    Pipe = mp.Pipe
     Process = mp.Process
     Value = mp.Value
+    reducer = mp.reducer
 
 
 MP_CONTEXTS = {'mp': {'fork': mp.get_context('fork') if FORK_AVAILABLE else None,
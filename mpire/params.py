@@ -1,6 +1,7 @@
 import itertools
 import math
 import multiprocessing as mp
+import os
 import warnings
 from dataclasses import dataclass, field
 from typing import Any, Callable, Dict, Iterable, List, Optional, Sized, Tuple, Type, Union
@@ -13,6 +14,9 @@ from mpire.tqdm_utils import get_tqdm
 # Typedefs
 CPUList = List[Union[int, List[int]]]
 
+# Minimum size in bytes of a numpy array to pass it on to the workers using shared memory
+DEFAULT_MIN_SHM_SIZE = 64 * 1024
+
 
 @dataclass(init=True, frozen=False)
 class WorkerPoolParams:
@@ -21,7 +25,7 @@ class WorkerPoolParams:
     """
     n_jobs: Optional[int]
     _n_jobs: int = field(init=False, repr=False)
-    cpu_ids: Optional[CPUList]
+    cpu_ids: Optional[Union[CPUList, str]]
     _cpu_ids: CPUList = field(init=False, repr=False)
     daemon: bool = True
     shared_objects: Any = None
@@ -32,6 +36,12 @@ class WorkerPoolParams:
     use_dill: bool = False
     enable_insights: bool = False
     order_tasks: bool = False
+    min_shm_size: Optional[int] = DEFAULT_MIN_SHM_SIZE
+
+    def __post_init__(self) -> None:
+        # Shared memory blocks need to have a positive size. This is checked here, as workers can be started before the
+        # first map call
+        check_number(self.min_shm_size, 'min_shm_size', allowed_types=(int,), none_allowed=True, min_=1)
 
     @property
     def n_jobs(self) -> Optional[int]:
@@ -46,10 +56,10 @@ class WorkerPoolParams:
         return self._cpu_ids
 
     @cpu_ids.setter
-    def cpu_ids(self, cpu_ids: Optional[CPUList]) -> None:
+    def cpu_ids(self, cpu_ids: Optional[Union[CPUList, str]]) -> None:
         self._cpu_ids = self._check_cpu_ids(cpu_ids)
 
-    def _check_cpu_ids(self, cpu_ids: Optional[CPUList]) -> CPUList:
+    def _check_cpu_ids(self, cpu_ids: Optional[Union[CPUList, str]]) -> CPUList:
         """
         Checks the cpu_ids parameter for correctness
 
@@ -58,8 +68,9 @@ class WorkerPoolParams:
             list must have exactly one element. In the former case, element x specifies the CPU ID(s) to use for child
             process x. In the latter case the single element specifies the CPU ID(s) for all child  processes to use. A
             single element can be either a single integer specifying a single CPU ID, or a list of integers specifying
-            that a single child process can make use of multiple CPU IDs. If ``None``, CPU pinning will be disabled.
-            Note that CPU pinning may only work on Linux based systems
+            that a single child process can make use of multiple CPU IDs. If ``'auto'``, child process x is pinned to
+            the x-th CPU available to the current process, in a round-robin fashion. If ``None``, CPU pinning will be
+            disabled. Note that CPU pinning may only work on Linux based systems
         :return: cpu_ids
         """
         # Check CPU IDs
@@ -68,7 +79,16 @@ class WorkerPoolParams:
             if RUNNING_MACOS:
                 warnings.warn("Setting CPU affinity is not supported on MacOS. Ignoring cpu_ids parameter", 
                               RuntimeWarning)
-            
+
+            # Pin each child process to a single CPU. Only the CPUs available to the current process are used, which can
+            # be a subset of all CPUs (e.g., when running in a container)
+            if isinstance(cpu_ids, str):
+                if cpu_ids != 'auto':
+                    raise ValueError("cpu_ids should be 'auto' when passing a string, got %r" % cpu_ids)
+                available_cpu_ids = (sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity')
+                                     else list(range(mp.cpu_count())))
+                return [[available_cpu_ids[worker_id % len(available_cpu_ids)]] for worker_id in range(self.n_jobs)]
+
             # Check number of arguments
             if len(cpu_ids) != 1 and len(cpu_ids) != self.n_jobs:
                 raise ValueError("Number of CPU IDs (%d) does not match number of jobs (%d)" %
@@ -110,8 +130,9 @@ class WorkerMapParams:
     """
     Data class for all :meth:`mpire.WorkerPool.map` parameters that need to be passed on to a worker.
     """
-    # User provided functions to call, provided to a map function
-    func: Callable
+    # User provided functions to call, provided to a map function. The function is None when the workers are started
+    # before any map call
+    func: Optional[Callable]
     worker_init: Optional[Callable] = None
     worker_exit: Optional[Callable] = None
 
@@ -126,6 +147,9 @@ class WorkerMapParams:
     worker_init_timeout: Optional[float] = None
     worker_exit_timeout: Optional[float] = None
 
+    # Whether workers can buffer the results of multiple chunks before sending them to the main process
+    buffer_results: bool = False
+
     def __eq__(self, other: 'WorkerMapParams') -> bool:
         """
         :param other: Other WorkerMapConfig
@@ -144,7 +168,8 @@ class WorkerMapParams:
                 other.progress_bar == self.progress_bar and
                 other.task_timeout == self.task_timeout and
                 other.worker_init_timeout == self.worker_init_timeout and
-                other.worker_exit_timeout == self.worker_exit_timeout)
+                other.worker_exit_timeout == self.worker_exit_timeout and
+                other.buffer_results == self.buffer_results)
 
 
 def check_map_parameters(pool_params: WorkerPoolParams, iterable_of_args: Union[Sized, Iterable],
@@ -1,10 +1,14 @@
+import copy
+import heapq
+import itertools
 import logging
+import math
+import operator
 import os
-import queue
 import signal
 import threading
 import time
-from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Sized, Union, Tuple
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Sized, Type, Union, Tuple
 
 try:
     import numpy as np
@@ -20,12 +24,13 @@ from mpire.context import DEFAULT_START_METHOD, RUNNING_WINDOWS
 from mpire.dashboard.connection_utils import get_dashboard_connection_details
 from mpire.exception import populate_exception
 from mpire.insights import WorkerInsights
-from mpire.params import check_map_parameters, CPUList, WorkerMapParams, WorkerPoolParams
+from mpire.params import check_map_parameters, CPUList, DEFAULT_MIN_SHM_SIZE, WorkerMapParams, WorkerPoolParams
 from mpire.progress_bar import ProgressBarHandler
 from mpire.signal import DisableKeyboardInterruptSignal
 from mpire.tqdm_utils import get_tqdm, TqdmManager
-from mpire.utils import apply_numpy_chunking, chunk_tasks, set_cpu_affinity
-from mpire.worker import MP_CONTEXTS, worker_factory
+from mpire.utils import (_NO_BUFFER_TYPES, apply_numpy_chunking, chunk_tasks, get_shared_memory_class,
+                         set_cpu_affinity, share_numpy_arrays, start_resource_tracker, unlink_shared_memory)
+from mpire.worker import AbstractWorker, MP_CONTEXTS, worker_factory
 
 logger = logging.getLogger(__name__)
 
@@ -35,10 +40,11 @@ class WorkerPool:
     A multiprocessing worker pool which acts like a ``multiprocessing.Pool``, but is faster and has more options.
     """
 
-    def __init__(self, n_jobs: Optional[int] = None, daemon: bool = True, cpu_ids: CPUList = None,
+    def __init__(self, n_jobs: Optional[int] = None, daemon: bool = True, cpu_ids: Union[CPUList, str] = None,
                  shared_objects: Any = None, pass_worker_id: bool = False, use_worker_state: bool = False,
                  start_method: str = DEFAULT_START_METHOD, keep_alive: bool = False, use_dill: bool = False,
-                 enable_insights: bool = False, order_tasks: bool = False) -> None:
+                 enable_insights: bool = False, order_tasks: bool = False,
+                 min_shm_size: Optional[int] = DEFAULT_MIN_SHM_SIZE, eager: bool = False) -> None:
         """
         :param n_jobs: Number of workers to spawn. If ``None``, will use ``mpire.cpu_count()``
         :param daemon: Whether to start the child processes as daemon
@@ -47,7 +53,9 @@ class WorkerPool:
             list must have exactly one element. In the former case, element `i` specifies the CPU ID(s) to use for child
             process `i`. In the latter case the single element specifies the CPU ID(s) for all child  processes to use.
             A single element can be either a single integer specifying a single CPU ID, or a list of integers specifying
-            that a single child process can make use of multiple CPU IDs. If ``None``, CPU pinning will be disabled
+            that a single child process can make use of multiple CPU IDs. If ``'auto'``, child process `i` is pinned to
+            the `i`-th CPU available to the current process, in a round-robin fashion. If ``None``, CPU pinning will be
+            disabled
         :param shared_objects: Objects to be passed on as shared objects to the workers once. It will be passed on to
             the target, ``worker_init``, and ``worker_exit`` functions. ``shared_objects`` is only passed on when it's
             not ``None``. Shared objects will be copy-on-write when using ``fork`` as start method. When enabled,
@@ -77,10 +85,20 @@ class WorkerPool:
             neglible)
         :param order_tasks: Whether to provide tasks to the workers in order, such that worker 0 will get chunk 0,
             worker 1 will get chunk 1, etc.
+        :param min_shm_size: Minimum size in bytes of a numpy array to pass it on to the workers using shared memory,
+            instead of pickling it. Applies to arrays in the arguments, including arrays in other objects like lists or
+            pandas dataframes when not using dill, and to arrays in the shared objects when using ``'spawn'`` or
+            ``'forkserver'``. Use ``None`` to disable. Shared memory isn't used on Windows or when using ``'threading'``
+            as start method
+        :param eager: Whether to start the workers right away, instead of on the first ``map`` or ``apply`` call. The
+            function to call is passed on to the running workers once it's known. Use together with ``keep_alive`` to
+            reuse the workers in between consecutive ``map`` calls. Progress bars of nested pools aren't supported
+            when using this option, as the workers are started before the progress bar state is set up
         """
         # Set parameters
         self.pool_params = WorkerPoolParams(n_jobs, cpu_ids, daemon, shared_objects, pass_worker_id, use_worker_state,
-                                            start_method, keep_alive, use_dill, enable_insights, order_tasks)
+                                            start_method, keep_alive, use_dill, enable_insights, order_tasks,
+                                            min_shm_size)
         self.map_params = None  # type: Optional[WorkerMapParams]
 
         # Worker factory
@@ -110,12 +128,32 @@ class WorkerPool:
         self._unexpected_death_handler_thread = None
         self._handler_threads_stop_event = threading.Event()
 
+        # Lock that is held while a worker is being (re)started. The worker process can already be running before the
+        # start() call returns, in which case the process object doesn't know yet it has been started
+        self._worker_restart_lock = threading.Lock()
+
         # Progress bar handler, in case it is used
         self._progress_bar_handler = None
 
+        # Names of shared memory blocks containing numpy arrays that are passed on to the workers. Workers unlink these
+        # once they've attached to them. Blocks of tasks that were never processed are unlinked when terminating
+        self._shared_memory_names = []
+
+        # Names of shared memory blocks containing numpy arrays from the shared objects, and the pool parameters passed
+        # on to the workers, which refer to these blocks. These blocks are used by all workers, so they're kept alive
+        # until the workers are stopped
+        self._shared_objects_memory_names = []
+        self._worker_pool_params = self.pool_params
+
         # Worker insights, used for profiling
         self._worker_insights = WorkerInsights(self.ctx, self.pool_params.n_jobs, self.pool_params.use_dill)
 
+        # Start the workers right away, if desired. The function to call isn't known yet. It will be passed on to the
+        # workers as new map parameters when a map function is called
+        if eager:
+            self.map_params = WorkerMapParams(func=None)
+            self._start_workers()
+
     def pass_on_worker_id(self, pass_on: bool = True) -> None:
         """
         Set whether to pass on the worker ID to the function to be executed or not (default= ``False``).
@@ -187,6 +225,23 @@ class WorkerPool:
         self._worker_comms.init_comms()
         self._worker_insights.reset_insights(self.pool_params.enable_insights)
 
+        # Workers need to use the same resource tracker as the main process when shared memory is used
+        shared_memory_class = get_shared_memory_class(self.pool_params.start_method, self.pool_params.use_dill,
+                                                      self.pool_params.min_shm_size)
+        if shared_memory_class is not None:
+            start_resource_tracker(self.pool_params.use_dill)
+
+        # Copy large numpy arrays in the shared objects to shared memory once, instead of pickling them for each worker.
+        # Forked workers inherit the shared objects, so there's no need for that when using fork
+        self._worker_pool_params = self.pool_params
+        if (shared_memory_class is not None and self.pool_params.start_method != 'fork' and
+                self.pool_params.shared_objects is not None):
+            self._worker_pool_params = copy.copy(self.pool_params)
+            self._worker_pool_params.shared_objects = share_numpy_arrays(
+                self.pool_params.shared_objects, self.pool_params.min_shm_size, shared_memory_class,
+                self._shared_objects_memory_names, self._get_shared_memory_pickler()
+            )
+
         # Start new workers
         self._workers = [None] * self.pool_params.n_jobs
         for worker_id in range(self.pool_params.n_jobs):
@@ -214,7 +269,7 @@ class WorkerPool:
         with DisableKeyboardInterruptSignal():
             # Create worker
             self._workers[worker_id] = self.Worker(
-                worker_id, self.pool_params, self.map_params, self._worker_comms, self._worker_insights,
+                worker_id, self._worker_pool_params, self.map_params, self._worker_comms, self._worker_insights,
                 TqdmManager.get_connection_details(), get_dashboard_connection_details(), time.time()
             )
             self._workers[worker_id].daemon = self.pool_params.daemon
@@ -225,6 +280,16 @@ class WorkerPool:
         if self.pool_params.cpu_ids:
             set_cpu_affinity(self._workers[worker_id].pid, self.pool_params.cpu_ids[worker_id])
 
+    def _get_shared_memory_pickler(self) -> Optional[Type]:
+        """
+        Obtains the pickler used for passing on objects holding large buffers using shared memory. This is the
+        ``ForkingPickler`` of the multiprocessing context, such that objects that need one of its reducers (e.g.,
+        connections) are pickled correctly. Dill doesn't hand over buffers out-of-band, so there's none in that case
+
+        :return: Pickler class or ``None``
+        """
+        return None if self.pool_params.use_dill else self.ctx.reducer.ForkingPickler
+
     def _results_handler(self) -> None:
         """
         Listen for results from the workers and add it to the cache. Note that when ``set`` is called on a result
@@ -232,30 +297,49 @@ class WorkerPool:
         """
         while True:
             results_batch = self._worker_comms.get_results(block=True)
-            for job_id, success, result in results_batch:
+            for (job_id, success), results in itertools.groupby(results_batch, key=operator.itemgetter(0, 1)):
+                results = [result for _, _, result in results]
 
                 # Poison pill, stop the listener
-                if isinstance(result, str) and result == POISON_PILL:
+                if isinstance(results[0], str) and results[0] == POISON_PILL:
                     return
 
-                try:
-                    if success:
-                        self._cache[job_id]._set(success=True, result=result)
-                    else:
-                        err, traceback_err = populate_exception(*result)
-                        err.__cause__ = traceback_err
-
-                        # When a worker_init times out, the pool shuts down and we set all tasks that haven't completed
-                        # yet to failed
-                        job_ids = ((set(self._cache.keys()) - {MAIN_PROCESS, EXIT_FUNC}) if job_id == INIT_FUNC else
-                                   {job_id})
-                        for _job_id in job_ids:
-                            self._cache[_job_id]._set(success=False, result=err)
-                except KeyError:
-                    # This can happen if the job has already been removed from the cache, which can occur if the job
-                    # has been cancelled, or if the job has been removed from the cache because the timeout has
-                    # expired
-                    pass
+                # Consecutive successful results of the same job are passed on to an iterator at once, such that it
+                # only needs to be notified once
+                result_obj = self._cache.get(job_id)
+                if success and isinstance(result_obj, UnorderedAsyncResultIterator):
+                    result_obj._set_batch(results)
+                    continue
+
+                for result in results:
+                    self._set_result(job_id, success, result)
+
+    def _set_result(self, job_id: int, success: bool, result: Any) -> None:
+        """
+        Pass on a single result to the result object in the cache
+
+        :param job_id: Job ID
+        :param success: Whether the task has finished successfully
+        :param result: Output of the function or the exception information when the task failed
+        """
+        try:
+            if success:
+                self._cache[job_id]._set(success=True, result=result)
+            else:
+                err, traceback_err = populate_exception(*result)
+                err.__cause__ = traceback_err
+
+                # When a worker_init times out, the pool shuts down and we set all tasks that haven't completed
+                # yet to failed
+                job_ids = ((set(self._cache.keys()) - {MAIN_PROCESS, EXIT_FUNC}) if job_id == INIT_FUNC else
+                           {job_id})
+                for _job_id in job_ids:
+                    self._cache[_job_id]._set(success=False, result=err)
+        except KeyError:
+            # This can happen if the job has already been removed from the cache, which can occur if the job
+            # has been cancelled, or if the job has been removed from the cache because the timeout has
+            # expired
+            pass
 
     def _restart_handler(self) -> None:
         """
@@ -279,8 +363,9 @@ class WorkerPool:
                     pass
 
                 # Start new worker
-                self._worker_comms.reset_worker_restart(worker_id)
-                self._start_worker(worker_id)
+                with self._worker_restart_lock:
+                    self._worker_comms.reset_worker_restart(worker_id)
+                    self._start_worker(worker_id)
 
     def _unexpected_death_handler(self) -> None:
         """
@@ -298,9 +383,11 @@ class WorkerPool:
             # we just wait a bit and try again.
             for worker_id in range(len(self._workers)):
                 try:
-                    worker_died = (self._worker_comms.is_worker_alive(worker_id) and
-                                   not self._workers[worker_id].is_alive())
-                except ValueError:
+                    with self._worker_restart_lock:
+                        worker_died = (self._worker_comms.is_worker_alive(worker_id) and
+                                       not self._workers[worker_id].is_alive())
+                except (IndexError, ValueError):
+                    # The workers can be joined and removed in the meantime
                     worker_died = False
 
                 if worker_died:
@@ -467,18 +554,28 @@ class WorkerPool:
         # Process all args
         if iterable_len is None and hasattr(iterable_of_args, '__len__'):
             iterable_len = len(iterable_of_args)
-        results = self.map_unordered(
-            func, ((args_idx, args) for args_idx, args in enumerate(iterable_of_args)), iterable_len, max_tasks_active,
-            chunk_size, n_splits, worker_lifespan, progress_bar, worker_init, worker_exit, task_timeout, 
-            worker_init_timeout, worker_exit_timeout, progress_bar_options, progress_bar_style
+        results_batches = self._imap_unordered_batches(
+            func, iterable_of_args, iterable_len, max_tasks_active, chunk_size, n_splits, worker_lifespan, progress_bar,
+            worker_init, worker_exit, task_timeout, worker_init_timeout, worker_exit_timeout, progress_bar_options,
+            progress_bar_style
         )
 
+        # Put each result directly in its place. The indices are contiguous starting from 0, so we can preallocate the
+        # output list when the number of tasks is known. Otherwise, the list is grown when needed. The iterable can
+        # hold fewer elements than iterable_len, so we remove the remaining placeholders at the end
+        sorted_results = [None] * iterable_len if iterable_len is not None else []
+        n_results = 0
+        for results_batch in results_batches:
+            for args_idx, result in results_batch:
+                if args_idx >= len(sorted_results):
+                    sorted_results.extend([None] * (args_idx + 1 - len(sorted_results)))
+                sorted_results[args_idx] = result
+            n_results += len(results_batch)
+        del sorted_results[n_results:]
+
         # Notify workers to forget about order
         self._worker_comms.clear_keep_order()
 
-        # Rearrange and return
-        sorted_results = [result[1] for result in sorted(results, key=lambda result: result[0])]
-
         # Convert back to numpy if necessary
         return (np.concatenate(sorted_results) if NUMPY_INSTALLED and sorted_results and concatenate_numpy_output and
                 isinstance(sorted_results[0], np.ndarray) else sorted_results)
@@ -533,11 +630,15 @@ class WorkerPool:
         :param progress_bar_style: The progress bar style to use. Can be one of ``None``, ``'std'``, or ``'notebook'``
         :return: List with unordered results
         """
-        # Simply call imap and cast it to a list. This make sure all elements are there before returning
-        return list(self.imap_unordered(func, iterable_of_args, iterable_len, max_tasks_active, chunk_size,
-                                        n_splits, worker_lifespan, progress_bar, worker_init, worker_exit, 
-                                        task_timeout, worker_init_timeout, worker_exit_timeout, progress_bar_options,
-                                        progress_bar_style))
+        # Gather all batches of results in a list. This make sure all elements are there before returning
+        results = []
+        for results_batch in self._imap_unordered_batches(func, iterable_of_args, iterable_len, max_tasks_active,
+                                                          chunk_size, n_splits, worker_lifespan, progress_bar,
+                                                          worker_init, worker_exit, task_timeout, worker_init_timeout,
+                                                          worker_exit_timeout, progress_bar_options,
+                                                          progress_bar_style):
+            results.extend(results_batch)
+        return results
 
     def imap(self, func: Callable, iterable_of_args: Union[Sized, Iterable], iterable_len: Optional[int] = None,
              max_tasks_active: Optional[int] = None, chunk_size: Optional[int] = None, n_splits: Optional[int] = None,
@@ -598,24 +699,20 @@ class WorkerPool:
 
         # Yield results in order
         next_result_idx = 0
-        tmp_results = {}
+        tmp_results = []
         if iterable_len is None and hasattr(iterable_of_args, '__len__'):
             iterable_len = len(iterable_of_args)
-        for result_idx, result in self.imap_unordered(func, ((args_idx, args) for args_idx, args
-                                                             in enumerate(iterable_of_args)), iterable_len,
-                                                      max_tasks_active, chunk_size, n_splits, worker_lifespan,
-                                                      progress_bar, worker_init, worker_exit, task_timeout, 
-                                                      worker_init_timeout, worker_exit_timeout, progress_bar_options,
-                                                      progress_bar_style):
-
-            # Check if the next one(s) to return is/are temporarily stored. We use a while-true block with dict.pop() to
-            # keep the temporary store as small as possible
-            while True:
-                if next_result_idx in tmp_results:
-                    yield tmp_results.pop(next_result_idx)
-                    next_result_idx += 1
-                else:
-                    break
+        for result_idx, result in self.imap_unordered(func, iterable_of_args, iterable_len, max_tasks_active,
+                                                      chunk_size, n_splits, worker_lifespan, progress_bar, worker_init,
+                                                      worker_exit, task_timeout, worker_init_timeout,
+                                                      worker_exit_timeout, progress_bar_options, progress_bar_style):
+
+            # Check if the next one(s) to return is/are temporarily stored. The temporary store is a min-heap on the
+            # result index, so the next one to return is always at the top. Indices are unique, so the results
+            # themselves are never compared
+            while tmp_results and tmp_results[0][0] == next_result_idx:
+                yield heapq.heappop(tmp_results)[1]
+                next_result_idx += 1
 
             # Check if the current result is the next one to return. If so, return it
             if result_idx == next_result_idx:
@@ -623,11 +720,11 @@ class WorkerPool:
                 next_result_idx += 1
             # Otherwise, temporarily store the current result
             else:
-                tmp_results[result_idx] = result
+                heapq.heappush(tmp_results, (result_idx, result))
 
-        # Yield all remaining results
-        for result_idx in sorted(tmp_results.keys()):
-            yield tmp_results.pop(result_idx)
+        # Yield all remaining results. Popping from the heap returns them in order
+        while tmp_results:
+            yield heapq.heappop(tmp_results)[1]
 
         # Notify workers to forget about order
         self._worker_comms.clear_keep_order()
@@ -682,6 +779,28 @@ class WorkerPool:
         :param progress_bar_style: The progress bar style to use. Can be one of ``None``, ``'std'``, or ``'notebook'``
         :return: Generator yielding unordered results
         """
+        for results in self._imap_unordered_batches(func, iterable_of_args, iterable_len, max_tasks_active, chunk_size,
+                                                    n_splits, worker_lifespan, progress_bar, worker_init, worker_exit,
+                                                    task_timeout, worker_init_timeout, worker_exit_timeout,
+                                                    progress_bar_options, progress_bar_style):
+            yield from results
+
+    def _imap_unordered_batches(self, func: Callable, iterable_of_args: Union[Sized, Iterable],
+                                iterable_len: Optional[int] = None, max_tasks_active: Optional[int] = None,
+                                chunk_size: Optional[int] = None, n_splits: Optional[int] = None,
+                                worker_lifespan: Optional[int] = None, progress_bar: bool = False,
+                                worker_init: Optional[Callable] = None, worker_exit: Optional[Callable] = None,
+                                task_timeout: Optional[float] = None, worker_init_timeout: Optional[float] = None,
+                                worker_exit_timeout: Optional[float] = None,
+                                progress_bar_options: Optional[Dict[str, Any]] = None,
+                                progress_bar_style: Optional[str] = None) -> Generator[List[Any], None, None]:
+        """
+        Same as ``imap_unordered``, but yields lists of results instead of individual results. Each list contains all
+        results that are available at that moment. This saves a generator step per result for the functions that
+        gather all results anyway. See ``imap_unordered`` for a description of the parameters.
+
+        :return: Generator yielding lists of unordered results
+        """
         # If we're dealing with numpy arrays, we have to chunk them here already
         iterator_of_chunked_args = []
         numpy_chunking = False
@@ -698,13 +817,32 @@ class WorkerPool:
             progress_bar, progress_bar_options, progress_bar_style, task_timeout, worker_init_timeout, 
             worker_exit_timeout
         )
+
+        # Workers can send the results of multiple chunks at once. Similar to buffering tasks, this only pays off when
+        # max_tasks_active allows for multiple full buffers per worker. Otherwise, the main process would be waiting
+        # for buffered results before it can hand out new tasks
+        buffer_results = max_tasks_active >= (self.pool_params.n_jobs * int(math.ceil(chunk_size)) *
+                                              AbstractWorker.results_buffer_max_chunks * 2)
         new_map_params = WorkerMapParams(func, worker_init, worker_exit, worker_lifespan, progress_bar, task_timeout,
-                                         worker_init_timeout, worker_exit_timeout)
+                                         worker_init_timeout, worker_exit_timeout, buffer_results)
 
         # Chunk the function arguments. Make single arguments when we're not dealing with numpy arrays
         if not numpy_chunking:
             iterator_of_chunked_args = chunk_tasks(iterable_of_args, n_tasks, chunk_size, n_splits)
 
+        # Chunks of tasks for the same worker are buffered and added to its task queue at once. This only pays off when
+        # max_tasks_active allows for multiple full buffers per worker, otherwise workers would sit idle while tasks are
+        # being buffered. It's disabled when a worker lifespan is set, as a worker could then be restarted before it
+        # processed all chunks it received
+        buffer_tasks = (worker_lifespan is None and
+                        max_tasks_active >= (self.pool_params.n_jobs * int(math.ceil(chunk_size)) *
+                                             self._worker_comms.task_buffer_max_chunks * 2))
+
+        # Large numpy arrays are passed on using shared memory, when available
+        shared_memory_class = get_shared_memory_class(self.pool_params.start_method, self.pool_params.use_dill,
+                                                      self.pool_params.min_shm_size)
+        shared_memory_pickler = self._get_shared_memory_pickler() if shared_memory_class is not None else None
+
         # Grab original lock in case we have a progress bar and we need to restore it
         tqdm = get_tqdm(progress_bar_style)
         original_tqdm_lock = tqdm.get_lock()
@@ -728,7 +866,7 @@ class WorkerPool:
             if self._workers and not self._worker_comms.is_initialized():
                 logger.warning("WorkerPool parameters changed while keep_alive=True. Restarting workers.")
                 self.stop_and_join(keep_alive=False)
-            if self._workers and (self.map_params != new_map_params):
+            if self._workers and (self.map_params.func is None or self.map_params != new_map_params):
                 self.map_params = new_map_params
                 self._worker_comms.add_new_map_params(new_map_params)
             if not self._workers:
@@ -746,7 +884,9 @@ class WorkerPool:
                                     progress_bar_style, self._worker_comms,
                                     self._worker_insights) as self._progress_bar_handler:
                 try:
-                    # Process all args in the iterable
+                    # Process all args in the iterable. Each chunk is tagged with the index of its first task when
+                    # keeping order, such that the workers can number the tasks themselves, or None otherwise
+                    keep_order = self._worker_comms.keep_order()
                     n_active = 0
                     n_tasks = 0
                     while True:
@@ -754,25 +894,45 @@ class WorkerPool:
                         # Obtain next chunk of tasks
                         try:
                             chunk_of_tasks = next(iterator_of_chunked_args)
+                            chunk_start_idx = n_tasks
                             n_tasks += len(chunk_of_tasks)
                         except StopIteration:
                             break
 
-                        # To keep the number of active tasks below max_tasks_active, we have to wait for results
+                        # To keep the number of active tasks below max_tasks_active, we have to wait for results. The
+                        # buffered tasks are added to the task queues first, as we could be waiting for their results
+                        if n_active + len(chunk_of_tasks) > max_tasks_active:
+                            self._worker_comms.flush_task_buffers()
                         while (not self._worker_comms.exception_thrown() and
                                n_active + len(chunk_of_tasks) > max_tasks_active):
-                            try:
-                                yield imap_iterator.next(block=True, timeout=0.01)
-                                n_active -= 1
-                            except queue.Empty:
-                                pass
+                            results = imap_iterator.next_batch(block=True, timeout=0.01)
+                            if results:
+                                n_active -= len(results)
+                                yield results
 
                         # If an exception has been thrown, stop now
                         if self._worker_comms.exception_thrown():
                             break
 
-                        self._worker_comms.add_task(job_id, chunk_of_tasks)
+                        # Tasks that can't hold buffers, like plain numbers, are skipped right away. The chunk is
+                        # tagged when it contains references to shared memory, such that workers only need to load
+                        # those chunks
+                        uses_shared_memory = False
+                        if shared_memory_class is not None:
+                            n_shared_memory_names = len(self._shared_memory_names)
+                            chunk_of_tasks = [args if type(args) in _NO_BUFFER_TYPES else
+                                              share_numpy_arrays(args, self.pool_params.min_shm_size,
+                                                                 shared_memory_class, self._shared_memory_names,
+                                                                 shared_memory_pickler)
+                                              for args in chunk_of_tasks]
+                            uses_shared_memory = len(self._shared_memory_names) > n_shared_memory_names
                         n_active += len(chunk_of_tasks)
+                        chunk_of_tasks = (chunk_start_idx if keep_order else None, uses_shared_memory, chunk_of_tasks)
+                        if buffer_tasks:
+                            self._worker_comms.buffer_task(job_id, chunk_of_tasks)
+                        else:
+                            self._worker_comms.add_task(job_id, chunk_of_tasks)
+                    self._worker_comms.flush_task_buffers()
 
                     # Obtain the results not yet obtained
                     if not self._worker_comms.exception_thrown():
@@ -780,17 +940,18 @@ class WorkerPool:
                         self._progress_bar_handler.set_new_total(n_tasks)
                     while not self._worker_comms.exception_thrown():
                         try:
-                            yield imap_iterator.next(block=True, timeout=0.1)
-                        except queue.Empty:
-                            pass
+                            results = imap_iterator.next_batch(block=True, timeout=0.1)
                         except StopIteration:
                             break
+                        if results:
+                            yield results
 
                     # Terminate if exception has been thrown at this point
                     if self._worker_comms.exception_thrown():
                         self._handle_exception()
 
-                    # All results are in: it's clean up time
+                    # All results are in: it's clean up time. All shared memory blocks have been unlinked by the workers
+                    self._shared_memory_names.clear()
                     self.stop_and_join(keep_alive=self.pool_params.keep_alive)
 
                     # Wait for the progress bar to finish, before we clean it up
@@ -888,11 +1049,16 @@ class WorkerPool:
             MPIRE will raise a ``TimeoutError``. Use ``None`` to disable (default).
         :return: Result of the function ``func`` applied to the task
         """
-        # Check if the pool has been started
+        # Check if the pool has been started. When the workers have been started eagerly, they still need the map
+        # parameters
         if not self._workers:
             self.map_params = WorkerMapParams(func, worker_init, worker_exit, None, False, task_timeout,
                                               worker_init_timeout, worker_exit_timeout)
             self._start_workers()
+        elif self.map_params.func is None:
+            self.map_params = WorkerMapParams(func, worker_init, worker_exit, None, False, task_timeout,
+                                              worker_init_timeout, worker_exit_timeout)
+            self._worker_comms.add_new_map_params(self.map_params)
 
         # Add task to the queue
         result = AsyncResult(self._cache, callback, error_callback, timeout=task_timeout)
@@ -960,41 +1126,45 @@ class WorkerPool:
             if self._worker_comms.exception_thrown():
                 self._handle_exception()
 
-            # Join workers
+            # Join workers. A restarted worker can already have consumed its poison pill before the restart handler is
+            # done starting it, so we wait for the restart handler to finish
             if not keep_alive:
-                for wid, worker_process in enumerate(self._workers):
-                    try:
-                        worker_process.join()
-                    except ValueError:
-                        raise
-                    # Added since Python 3.7. This will clean up any resources that are left. For some reason though,
-                    # when using daemon processes and nested pools, a process can still be alive after the join when
-                    # close is called and a ValueError is raised. So we wait a bit and check if the process will die. If
-                    # not, then the GC can clean up the resources later.
-                    if hasattr(worker_process, 'close'):
-                        try_count = 5
-                        while worker_process.is_alive() and try_count > 0:
-                            time.sleep(0.01)
-                            try_count -= 1
+                with self._worker_restart_lock:
+                    for wid, worker_process in enumerate(self._workers):
                         try:
-                            worker_process.close()
+                            worker_process.join()
                         except ValueError:
-                            pass
-                self._workers = []
+                            raise
+                        # Added since Python 3.7. This will clean up any resources that are left. For some reason
+                        # though, when using daemon processes and nested pools, a process can still be alive after the
+                        # join when close is called and a ValueError is raised. So we wait a bit and check if the
+                        # process will die. If not, then the GC can clean up the resources later.
+                        if hasattr(worker_process, 'close'):
+                            try_count = 5
+                            while worker_process.is_alive() and try_count > 0:
+                                time.sleep(0.01)
+                                try_count -= 1
+                            try:
+                                worker_process.close()
+                            except ValueError:
+                                pass
+                    self._workers = []
+                self._unlink_shared_objects_memory()
 
-            # Join the results queue, but do not close it. All results should be in the cache at this point (including
-            # exit results, because the workers joined successfully or keep_alive=True and the exit function isn't
-            # called), but we still need this queue for closing the results listener thread
-            self._worker_comms.join_results_queues(keep_alive=True)
+            # Wait until all results have been received, but do not close the results pipes. All results should be in
+            # the cache at this point (including exit results, because the workers joined successfully or
+            # keep_alive=True and the exit function isn't called), but we still need these pipes for closing the
+            # results listener thread
+            self._worker_comms.wait_until_all_results_received()
 
             # If an exception occurred in the exit function, we need to handle the exception (i.e., terminate and raise)
             if self._worker_comms.exception_thrown():
                 self._handle_exception()
 
-            # Stop handler threads and join and close the results queue if we're not keeping the workers alive
+            # Stop handler threads and close the results pipes if we're not keeping the workers alive
             if not keep_alive:
                 self._stop_handler_threads()
-                self._worker_comms.join_results_queues(keep_alive=False)
+                self._worker_comms.close_results_pipes()
 
     join = stop_and_join
 
@@ -1039,10 +1209,30 @@ class WorkerPool:
         # Drain and join the queues
         self._worker_comms.drain_queues()
 
+        # Unlink shared memory blocks of tasks that haven't been processed
+        if self._shared_memory_names:
+            unlink_shared_memory(self._shared_memory_names, get_shared_memory_class(
+                self.pool_params.start_method, self.pool_params.use_dill, self.pool_params.min_shm_size
+            ))
+            self._shared_memory_names.clear()
+        self._unlink_shared_objects_memory()
+
         # Reset workers and cache. Keep only the main process, init and exit results objects
         self._workers = []
         self._cache = {key: self._cache[key] for key in (MAIN_PROCESS, INIT_FUNC, EXIT_FUNC)}
 
+    def _unlink_shared_objects_memory(self) -> None:
+        """
+        Unlinks the shared memory blocks containing numpy arrays from the shared objects. Should only be called when
+        the workers have been stopped
+        """
+        if self._shared_objects_memory_names:
+            unlink_shared_memory(self._shared_objects_memory_names, get_shared_memory_class(
+                self.pool_params.start_method, self.pool_params.use_dill, self.pool_params.min_shm_size
+            ))
+            self._shared_objects_memory_names.clear()
+        self._worker_pool_params = self.pool_params
+
     def _terminate_worker(self, worker_id: int, dont_wait_event: threading.Event) -> None:
         """
         Terminates a single worker process.
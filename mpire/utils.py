@@ -1,13 +1,17 @@
 import heapq
+import io
 import itertools
 import math
 import os
+import pickle
 import time
-from datetime import timedelta
-from multiprocessing import cpu_count
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from multiprocessing import cpu_count, resource_tracker
 from multiprocessing.managers import SyncManager
+from multiprocessing.shared_memory import SharedMemory
 from multiprocessing.sharedctypes import SynchronizedArray
-from typing import Callable, Collection, Generator, Iterable, List, Optional, Tuple, Union
+from typing import Any, Callable, Collection, Generator, Iterable, List, Optional, Tuple, Type, Union
 
 try:
     import numpy as np
@@ -83,30 +87,49 @@ def chunk_tasks(iterable_of_args: Iterable, iterable_len: Optional[int] = None,
     if chunk_size is None and n_splits is None:
         raise ValueError("chunk_size and n_splits cannot both be None")
 
+    # Get number of tasks
+    if iterable_len is not None:
+        n_tasks = iterable_len
+    elif hasattr(iterable_of_args, '__len__'):
+        n_tasks = len(iterable_of_args)
+    else:
+        n_tasks = None
+
     # Determine chunk size
     if chunk_size is None:
-        # Get number of tasks
-        if iterable_len is not None:
-            n_tasks = iterable_len
-        elif hasattr(iterable_of_args, '__len__'):
-            n_tasks = len(iterable_of_args)
-        else:
+        if n_tasks is None:
             raise ValueError('Either iterable_len or an iterable with a len() function should be provided when '
                              'chunk_size and n_splits are None')
-
-        # Determine chunk size
         chunk_size = n_tasks / n_splits
 
-    # Chunk tasks
-    args_iter = iter(iterable_of_args)
+    # When the number of tasks is known and the chunk size is fractional, we determine the number of chunks and divide
+    # the tasks evenly over them. The first chunks get one task extra, such that the last chunks are the smallest ones.
+    # The number of chunks is rounded first to protect against floating point errors (e.g., 10 / (10 / 3) > 3).
+    # Chunks of size 1 follow, which are only used to detect that the iterable holds more elements than the given
+    # iterable length
+    chunk_sizes = None
+    if n_tasks and chunk_size != math.floor(chunk_size):
+        n_chunks = max(1, math.ceil(round(n_tasks / chunk_size, 9)))
+        base_chunk_size, n_larger_chunks = divmod(n_tasks, n_chunks)
+        chunk_sizes = itertools.chain(itertools.repeat(base_chunk_size + 1, n_larger_chunks),
+                                      itertools.repeat(base_chunk_size, n_chunks - n_larger_chunks),
+                                      itertools.repeat(1))
+
+    # Chunk tasks. Numpy arrays, lists, and tuples are sliced directly, which is faster than iterating over them
+    use_slicing = (isinstance(iterable_of_args, (list, tuple)) or
+                   (NUMPY_INSTALLED and isinstance(iterable_of_args, np.ndarray)))
+    args_iter = None if use_slicing else iter(iterable_of_args)
     current_chunk_size = chunk_size
     n_elements_returned = 0
     while True:
-        # Use numpy slicing if available. We use max(1, ...) to always at least get one element
-        if NUMPY_INSTALLED and isinstance(iterable_of_args, np.ndarray):
-            chunk = iterable_of_args[n_elements_returned:n_elements_returned + max(1, math.ceil(current_chunk_size))]
+        # We use max(1, ...) to always at least get one element
+        next_chunk_size = next(chunk_sizes) if chunk_sizes is not None else max(1, math.ceil(current_chunk_size))
+        if use_slicing:
+            chunk = iterable_of_args[n_elements_returned:n_elements_returned + next_chunk_size]
+            if isinstance(chunk, list):
+                chunk = tuple(chunk)
         else:
-            chunk = tuple(itertools.islice(args_iter, max(1, math.ceil(current_chunk_size))))
+            chunk = tuple(itertools.islice(args_iter, next_chunk_size))
 
         # If we ran out of input, we stop
         if len(chunk) == 0:
@@ -195,6 +218,271 @@ def make_single_arguments(iterable_of_args: Iterable, generator: bool = True) ->
     return gen if generator else list(gen)
 
 
+@dataclass(frozen=True)
+class SharedNumpyArray:
+    """
+    Reference to a numpy array that has been copied to a shared memory block
+    """
+    name: str
+    shape: Tuple[int, ...]
+    dtype: Any
+
+
+@dataclass(frozen=True)
+class SharedPickle:
+    """
+    Object pickled using protocol 5, of which the large out-of-band buffers (if any) have been copied to shared memory
+    blocks
+    """
+    data: bytes
+    buffers: Tuple[Tuple[str, int], ...]
+
+
+# Types that never contain buffers worth passing on using shared memory
+_NO_BUFFER_TYPES = {bool, bytes, complex, date, datetime, float, int, str, timedelta, type(None)}
+
+# Containers that are searched for objects that can contain such buffers
+_CONTAINER_TYPES = {frozenset, list, set, tuple}
+
+
+def get_shared_memory_class(start_method: str, use_dill: bool, min_shm_size: Optional[int]) -> Optional[Type]:
+    """
+    Obtain the shared memory class to use for passing on large numpy arrays to the workers. Shared memory is only used
+    for processes on non-Windows systems. On Windows, a shared memory block is destroyed as soon as the main process
+    closes it, before a worker had the chance to attach to it.
+
+    :param start_method: Which process start method to use
+    :param use_dill: Whether dill is used as serialization library
+    :param min_shm_size: Minimum size in bytes of a numpy array to pass it on using shared memory. If ``None``, shared
+        memory is disabled
+    :return: Shared memory class or ``None`` when shared memory should not be used
+    """
+    if min_shm_size is None or not NUMPY_INSTALLED or RUNNING_WINDOWS or start_method == 'threading':
+        return None
+    return mp_dill.shared_memory.SharedMemory if use_dill else SharedMemory
+
+
+def start_resource_tracker(use_dill: bool) -> None:
+    """
+    Start the resource tracker, which keeps track of shared memory blocks, if it isn't running already. This needs to
+    happen before workers are forked. Otherwise, each worker starts its own resource tracker and the resource tracker of
+    the main process doesn't know the workers unlinked the shared memory blocks.
+
+    :param use_dill: Whether dill is used as serialization library
+    """
+    (mp_dill.resource_tracker if use_dill else resource_tracker).ensure_running()
+
+
+def share_numpy_arrays(args: Any, min_shm_size: int, shared_memory_class: Type, shared_memory_names: List[str],
+                       pickler: Optional[Type] = None) -> Any:
+    """
+    Copies numpy arrays in the arguments of a single task to shared memory and replaces them with references to the
+    shared memory blocks. Only arrays of at least ``min_shm_size`` bytes are copied. Tuples are searched recursively and
+    the values of a dictionary of keyword arguments are searched as well. Other objects, like lists or pandas
+    dataframes, are pickled using protocol 5 when a pickler is given, which hands over the buffers of the numpy arrays
+    they contain out-of-band. Large buffers are copied to shared memory instead of being copied into the pickle stream.
+    Objects that can't contain large buffers, like lists of numbers, and subclasses of numpy arrays are left alone. The
+    names of the created shared memory blocks are added to ``shared_memory_names``, such that the blocks can be cleaned
+    up when a task is never processed.
+
+    :param args: Arguments of a single task
+    :param min_shm_size: Minimum size in bytes of a numpy array to copy it to shared memory
+    :param shared_memory_class: Shared memory class to use
+    :param shared_memory_names: List to which the names of the created shared memory blocks are added
+    :param pickler: Pickler class to use for other objects, like ``ForkingPickler`` of the multiprocessing context,
+        such that the reducers registered on it are used. If ``None``, other objects are left alone
+    :return: Arguments with large numpy arrays replaced by ``SharedNumpyArray`` or ``SharedPickle`` references
+    """
+    if type(args) is tuple:
+        return tuple(share_numpy_arrays(arg, min_shm_size, shared_memory_class, shared_memory_names, pickler)
+                     for arg in args)
+    elif type(args) is dict:
+        return {key: share_numpy_arrays(arg, min_shm_size, shared_memory_class, shared_memory_names, pickler)
+                for key, arg in args.items()}
+    elif type(args) in _NO_BUFFER_TYPES:
+        return args
+    elif type(args) is not np.ndarray:
+        if pickler is None or not _may_hold_buffers(args, min_shm_size):
+            return args
+        return _share_pickle_buffers(args, min_shm_size, shared_memory_class, shared_memory_names, pickler)
+    elif args.nbytes < min_shm_size or args.dtype.hasobject:
+        return args
+
+    shm = shared_memory_class(create=True, size=args.nbytes)
+    np.frombuffer(shm.buf, dtype=args.dtype, count=args.size).reshape(args.shape)[...] = args
+    shared_memory_names.append(shm.name)
+    shm.close()
+    return SharedNumpyArray(shm.name, args.shape, args.dtype)
+
+
+def _may_hold_buffers(obj: Any, min_shm_size: int) -> bool:
+    """
+    Checks whether an object could contain buffers of at least ``min_shm_size`` bytes. Containers are searched
+    recursively. Other objects, like pandas dataframes or custom classes, are assumed to contain them
+
+    :param obj: Object to check
+    :param min_shm_size: Minimum size in bytes of a buffer to copy it to shared memory
+    :return: ``False`` when the object certainly doesn't contain large buffers, ``True`` otherwise
+    """
+    obj_type = type(obj)
+    if obj_type in _NO_BUFFER_TYPES or isinstance(obj, np.generic):
+        return False
+    elif obj_type is np.ndarray:
+        return obj.nbytes >= min_shm_size and not obj.dtype.hasobject
+    elif isinstance(obj, np.ndarray):
+        # Subclasses of numpy arrays are always pickled as usual
+        return False
+    elif obj_type in _CONTAINER_TYPES or obj_type is dict:
+        for item in (obj.values() if obj_type is dict else obj):
+            if type(item) not in _NO_BUFFER_TYPES and _may_hold_buffers(item, min_shm_size):
+                return True
+        return False
+    return True
+
+
+def _share_pickle_buffers(obj: Any, min_shm_size: int, shared_memory_class: Type, shared_memory_names: List[str],
+                          pickler: Type) -> Any:
+    """
+    Pickles an object using protocol 5 and copies the out-of-band buffers of at least ``min_shm_size`` bytes to shared
+    memory. Smaller buffers are serialized in-band. The pickled data is passed on even when there are no large buffers,
+    such that the object doesn't need to be pickled again by the task queue.
+
+    :param obj: Object to pickle
+    :param min_shm_size: Minimum size in bytes of a buffer to copy it to shared memory
+    :param shared_memory_class: Shared memory class to use
+    :param shared_memory_names: List to which the names of the created shared memory blocks are added
+    :param pickler: Pickler class to use
+    :return: ``SharedPickle`` reference, or the object itself when it can't be pickled or doesn't hold large buffers
+    """
+    buffers = []
+
+    def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+        # Returning True means the buffer is serialized in-band
+        n_bytes = buffer.raw().nbytes
+        if n_bytes < min_shm_size or not n_bytes:
+            return True
+        buffers.append(buffer)
+        return False
+
+    # The arguments are passed on positionally, as that's the only way ForkingPickler accepts them
+    data = io.BytesIO()
+    try:
+        pickler(data, pickle.HIGHEST_PROTOCOL, True, buffer_callback).dump(obj)
+    except Exception:
+        # The object can't be pickled by this pickler (e.g., when dill is needed). Leave it to the serialization
+        # library of the task queue
+        return obj
+
+    # Without large buffers there's nothing to gain, so the object is left to the task queue as well
+    if not buffers:
+        return obj
+
+    shared_buffers = []
+    for buffer in buffers:
+        raw = buffer.raw()
+        shm = shared_memory_class(create=True, size=raw.nbytes)
+        shm.buf[:raw.nbytes] = raw
+        shared_memory_names.append(shm.name)
+        shared_buffers.append((shm.name, raw.nbytes))
+        shm.close()
+    return SharedPickle(data.getvalue(), tuple(shared_buffers))
+
+
+def load_shared_numpy_arrays(args: Any, shared_memory_class: Type, shared_memory_blocks: List,
+                             persistent: bool = False) -> Any:
+    """
+    Replaces references to shared memory blocks in the arguments of a single task with the numpy arrays (or pickled
+    objects) they contain. The shared memory blocks are unlinked right away, as each block is only used once. The
+    memory itself is freed once the shared memory block is closed.
+
+    :param args: Arguments of a single task, as returned by ``share_numpy_arrays``
+    :param shared_memory_class: Shared memory class to use
+    :param shared_memory_blocks: List to which the attached shared memory blocks are added, such that they can be
+        closed when the numpy arrays are no longer in use
+    :param persistent: Whether the shared memory blocks are used by multiple workers, as is the case for shared
+        objects. If so, the blocks aren't unlinked and the numpy arrays are made read-only
+    :return: Arguments with ``SharedNumpyArray`` and ``SharedPickle`` references replaced by the objects they refer to
+    """
+    if type(args) is tuple:
+        return tuple(load_shared_numpy_arrays(arg, shared_memory_class, shared_memory_blocks, persistent)
+                     for arg in args)
+    elif type(args) is dict:
+        return {key: load_shared_numpy_arrays(arg, shared_memory_class, shared_memory_blocks, persistent)
+                for key, arg in args.items()}
+    elif type(args) is SharedPickle:
+        return _load_pickle_buffers(args, shared_memory_class, shared_memory_blocks, persistent)
+    elif type(args) is not SharedNumpyArray:
+        return args
+
+    shm = shared_memory_class(name=args.name)
+    if not persistent:
+        shm.unlink()
+    shared_memory_blocks.append(shm)
+
+    # The array should be created using np.frombuffer, such that closing the shared memory block fails with a
+    # BufferError as long as the array, or a view of it, is still in use
+    array = np.frombuffer(shm.buf, dtype=args.dtype, count=math.prod(args.shape)).reshape(args.shape)
+    if persistent:
+        array.flags.writeable = False
+    return array
+
+
+def _load_pickle_buffers(shared_pickle: SharedPickle, shared_memory_class: Type, shared_memory_blocks: List,
+                         persistent: bool) -> Any:
+    """
+    Unpickles an object of which the out-of-band buffers have been copied to shared memory. The objects are created on
+    top of the shared memory blocks, so closing a block fails with a BufferError as long as they are still in use
+
+    :param shared_pickle: ``SharedPickle`` reference
+    :param shared_memory_class: Shared memory class to use
+    :param shared_memory_blocks: List to which the attached shared memory blocks are added
+    :param persistent: Whether the shared memory blocks are used by multiple workers. If so, the blocks aren't unlinked
+        and the buffers are made read-only
+    :return: Unpickled object
+    """
+    buffers = []
+    for name, n_bytes in shared_pickle.buffers:
+        shm = shared_memory_class(name=name)
+        if not persistent:
+            shm.unlink()
+        shared_memory_blocks.append(shm)
+        buffers.append(shm.buf[:n_bytes].toreadonly() if persistent else shm.buf[:n_bytes])
+    return pickle.loads(shared_pickle.data, buffers=buffers)
+
+
+def close_shared_memory(shared_memory_blocks: List) -> List:
+    """
+    Closes shared memory blocks. Blocks that are still in use (i.e., there are numpy arrays pointing to them) can't be
+    closed yet
+
+    :param shared_memory_blocks: List of shared memory blocks
+    :return: List of shared memory blocks that are still in use
+    """
+    still_in_use = []
+    for shm in shared_memory_blocks:
+        try:
+            shm.close()
+        except BufferError:
+            still_in_use.append(shm)
+    return still_in_use
+
+
+def unlink_shared_memory(shared_memory_names: Iterable[str], shared_memory_class: Type) -> None:
+    """
+    Unlinks shared memory blocks that haven't been unlinked by a worker yet
+
+    :param shared_memory_names: Names of shared memory blocks
+    :param shared_memory_class: Shared memory class to use
+    """
+    for name in shared_memory_names:
+        try:
+            shm = shared_memory_class(name=name)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
+
+
 def format_seconds(seconds: Optional[Union[int, float]], with_milliseconds: bool) -> str:
     """
     Format seconds to a string, optionally with or without milliseconds
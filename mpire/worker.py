@@ -9,7 +9,7 @@ import time
 import traceback
 import _thread
 from functools import partial
-from threading import current_thread, main_thread, Thread
+from threading import current_thread, Event, Lock, main_thread, Thread
 from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
 try:
@@ -24,15 +24,15 @@ except ImportError:
     np = None
     NUMPY_INSTALLED = False
 
-from mpire.comms import (APPLY_PILL, EXIT_FUNC, INIT_FUNC, NEW_MAP_PARAMS_PILL, NON_LETHAL_POISON_PILL, POISON_PILL,
-                         WorkerComms)
+from mpire.comms import (APPLY_PILL, EXIT_FUNC, INIT_FUNC, MAIN_PROCESS, NEW_MAP_PARAMS_PILL, NON_LETHAL_POISON_PILL,
+                         POISON_PILL, WorkerComms)
 from mpire.context import FORK_AVAILABLE, MP_CONTEXTS, RUNNING_WINDOWS
 from mpire.dashboard.connection_utils import DashboardConnectionDetails, set_dashboard_connection
 from mpire.exception import CannotPickleExceptionError, InterruptWorker, StopWorker
 from mpire.insights import WorkerInsights
 from mpire.params import WorkerMapParams, WorkerPoolParams
 from mpire.tqdm_utils import TqdmConnectionDetails, TqdmManager
-from mpire.utils import TimeIt
+from mpire.utils import close_shared_memory, get_shared_memory_class, load_shared_numpy_arrays, TimeIt
 
 
 class AbstractWorker:
@@ -40,6 +40,13 @@ class AbstractWorker:
     A multiprocessing helper class which continuously asks the queue for new jobs, until a poison pill is inserted
     """
 
+    # Maximum number of chunks of results to buffer before sending them to the main process, and the maximum amount of
+    # time in between sending results. Results are only buffered when the map parameters allow it and are always sent
+    # when there's no new chunk of tasks readily available. A separate thread makes sure results are sent on time, even
+    # when the next chunk of tasks takes a long time
+    results_buffer_max_chunks = 8
+    results_buffer_max_interval = 0.1
+
     def __init__(self, worker_id: int, pool_params: WorkerPoolParams, map_params: WorkerMapParams,
                  worker_comms: WorkerComms, worker_insights: WorkerInsights,
                  tqdm_connection_details: TqdmConnectionDetails,
@@ -80,15 +87,48 @@ class AbstractWorker:
         self.last_job_id = None
         self.init_func_completed = False
 
+        # Whether to keep order in mind for the current chunk of tasks and whether the chunk contains references to
+        # shared memory. Each chunk is tagged by the main process
+        self.keep_order = False
+        self.chunk_uses_shared_memory = False
+
+        # Results that still need to be sent to the main process. Sending results of multiple chunks at once reduces
+        # the number of writes to the results pipe and the number of pickle calls
+        self.results_buffer = []
+        self.results_buffer_n_chunks = 0
+        self.results_buffer_last_sent = time.time()
+
+        # Guards the results buffer and the results pipe, as results are sent from the results flusher thread as well.
+        # That thread also passes on exceptions from signal handlers, as these can interrupt the main thread while it's
+        # writing to the results pipe. The lock and event are created when the worker runs, as they can't be pickled
+        # when using spawn or forkserver
+        self.results_buffer_lock = None
+        self.results_flusher = None
+        self.results_flusher_event = None
+        self.results_flusher_stop = False
+        self.results_flusher_exception = None
+
+        # Large numpy arrays are passed on by the main process using shared memory. Shared memory blocks can only be
+        # closed when the arrays are no longer in use, which is after the results have been sent
+        self.shared_memory_class = get_shared_memory_class(pool_params.start_method, pool_params.use_dill,
+                                                           pool_params.min_shm_size)
+        self.shared_memory_blocks = []
+
+        # Large numpy arrays in the shared objects are passed on using shared memory as well, when the workers don't
+        # inherit them. These blocks are used by all workers and are kept open for the lifetime of this worker
+        self.shared_objects_memory_blocks = []
+
     def run(self) -> None:
         """
         Continuously asks the tasks queue for new task arguments. When not receiving a poisonous pill or when the max
-        life span is not yet reached it will execute the new task and put the results in the results queue.
+        life span is not yet reached it will execute the new task and put the results in the results pipe.
         """
         # Register handlers for graceful shutdown
         self._set_signal_handlers()
 
         n_tasks_executed = 0
+        self.results_buffer_lock = Lock()
+        self.results_flusher_event = Event()
         try:
             self.worker_comms.signal_worker_alive(self.worker_id)
             self.worker_comms.reset_results_received(self.worker_id)
@@ -104,15 +144,29 @@ class AbstractWorker:
             # Gather and set additional args to pass to the function
             self._set_additional_args()
 
-            # Determine what function to call. If we have to keep in mind the order (for map) we use the helper function
-            # with idx support which deals with the provided idx variable.
-            func = self._get_func(self.map_params.func)
+            # Determine what functions to call. For chunks of tasks for which we have to keep in mind the order (for
+            # map) we use the helper function with idx support which deals with the provided idx variable. When the
+            # workers are started before any map call, the function to call is passed on later as new map parameters
+            func, func_with_idx = self._get_map_funcs()
+
+            # Bind attributes that are used for every chunk of tasks to local variables, which are faster to look up
+            worker_id = self.worker_id
+            get_task = self.worker_comms.get_task
+            task_done = self.worker_comms.task_done
+            worker_waiting_time = self.worker_insights.worker_waiting_time
+            run_func = self._run_func
+            update_progress_bar = self._update_progress_bar
+            update_task_insights = self._update_task_insights
+
+            # Start the thread that sends buffered results which have been waiting for too long
+            self.results_flusher = Thread(target=self._flush_results_periodically, daemon=True)
+            self.results_flusher.start()
 
             while self.map_params.worker_lifespan is None or n_tasks_executed < self.map_params.worker_lifespan:
 
                 # Obtain new chunk of jobs
-                with TimeIt(self.worker_insights.worker_waiting_time, self.worker_id):
-                    next_chunked_args = self.worker_comms.get_task(self.worker_id)
+                with TimeIt(worker_waiting_time, worker_id):
+                    next_chunked_args = get_task(worker_id)
                     apply_func = None
                     is_apply_func = False
 
@@ -126,12 +180,12 @@ class AbstractWorker:
 
                 # Update the map parameters of this function when new parameters are provided
                 elif next_chunked_args == NEW_MAP_PARAMS_PILL:
-                    func = self._handle_new_map_params()
-                    if func is None:
+                    if not self._handle_new_map_params():
                         return
+                    func, func_with_idx = self._get_map_funcs()
                     continue
 
-                # When an apply pill is received, we simply execute the function and put the result in the results queue
+                # When an apply pill is received, we simply execute the function and put the result in the results pipe
                 elif next_chunked_args == APPLY_PILL:
                     apply_func, next_chunked_args = self._handle_apply_pill()
                     if apply_func is None:
@@ -144,7 +198,8 @@ class AbstractWorker:
 
                 # Execute jobs in this chunk
                 try:
-                    job_id, next_chunked_args = next_chunked_args
+                    job_id, (chunk_start_idx, self.chunk_uses_shared_memory, next_chunked_args) = next_chunked_args
+                    self.keep_order = chunk_start_idx is not None
 
                     # Run initialization function. If it returns True it means an exception occurred and we should exit.
                     # This is only run if the init function hasn't been run yet.
@@ -154,13 +209,21 @@ class AbstractWorker:
                     # We only set the is_apply_func flag when we are not running the init/exit functions
                     self.is_apply_func = is_apply_func
 
+                    # When keeping order, a chunk is tagged with the index of its first task. The helper function with
+                    # idx support expects (idx, args) tuples
+                    if is_apply_func:
+                        chunk_func = apply_func
+                    elif self.keep_order:
+                        chunk_func = func_with_idx
+                        next_chunked_args = enumerate(next_chunked_args, chunk_start_idx)
+                    else:
+                        chunk_func = func
+
                     results = []
                     for args in next_chunked_args:
 
                         # Try to run this function and save results
-                        results_part, success, send_results, should_shut_down = self._run_func(
-                            apply_func if is_apply_func else func, job_id, args
-                        )
+                        results_part, success, send_results, should_shut_down = run_func(chunk_func, job_id, args)
                         if should_shut_down:
                             return
                         if send_results:
@@ -168,28 +231,42 @@ class AbstractWorker:
 
                         # Update progress bar info
                         if not is_apply_func:
-                            self._update_progress_bar()
+                            update_progress_bar()
 
-                    # Send results back to main process
+                    # Send results back to main process. Results of apply tasks are never buffered
                     if results:
-                        self.worker_comms.add_results(self.worker_id, results)
+                        self._add_results(results, send=is_apply_func)
                     n_tasks_executed += len(results)
 
                 # In case an exception occurred and we need to return, we want to call task_done no matter what
                 finally:
                     self.is_apply_func = False
-                    self.worker_comms.task_done(self.worker_id)
+                    task_done(worker_id)
 
                 # Update task insights
-                self._update_task_insights()
+                update_task_insights()
 
             # Max lifespan reached
+            self._send_results()
             self._update_task_insights(force_update=True)
             self._update_progress_bar(force_update=True)
             if self.map_params.worker_exit and self._run_exit_func():
                 return
 
+        except StopWorker:
+            # Results couldn't be sent to the main process. The exception has been passed on already
+            return
+
         finally:
+            # Stop the results flusher thread. A signal handler could've passed on an exception after the thread
+            # stopped, in which case we pass it on ourselves
+            if self.results_flusher is not None:
+                self.results_flusher_stop = True
+                self.results_flusher_event.set()
+                self.results_flusher.join()
+            if self.results_flusher_exception is not None:
+                self._raise(*self.results_flusher_exception)
+
             # Wait until all results have been received, otherwise the main process might deadlock
             self.worker_comms.wait_for_all_results_received(self.worker_id)
 
@@ -232,7 +309,23 @@ class AbstractWorker:
             if self.worker_comms.get_worker_running_task(self.worker_id):
                 raise err
             else:
-                self._raise(self.last_job_id, None, err)
+                # Workers that are started eagerly can be killed before they've worked on any job
+                job_id = self.last_job_id if self.last_job_id is not None else MAIN_PROCESS
+                self._raise_from_results_flusher(job_id, err)
+
+    def _raise_from_results_flusher(self, job_id: Optional[int], err: Exception) -> None:
+        """
+        Pass on an exception from a signal handler. Signal handlers run on the main thread and can interrupt it while
+        it's writing to the results pipe, so the exception is passed on by the results flusher thread instead
+
+        :param job_id: Job ID
+        :param err: Exception that should be passed on to parent process
+        """
+        if self.results_flusher is not None and self.results_flusher.is_alive():
+            self.results_flusher_exception = (job_id, None, err)
+            self.results_flusher_event.set()
+        else:
+            self._raise(job_id, None, err)
 
     def _on_exception_exit_gracefully(self, *_) -> None:
         """
@@ -292,23 +385,36 @@ class AbstractWorker:
         if self.pool_params.pass_worker_id:
             self.additional_args.append(self.worker_id)
         if self.pool_params.shared_objects is not None:
-            self.additional_args.append(self.pool_params.shared_objects)
+            shared_objects = self.pool_params.shared_objects
+            if self.shared_memory_class is not None:
+                shared_objects = load_shared_numpy_arrays(shared_objects, self.shared_memory_class,
+                                                          self.shared_objects_memory_blocks, persistent=True)
+            self.additional_args.append(shared_objects)
         if self.pool_params.use_worker_state:
             self.additional_args.append(self.worker_state)
 
-    def _get_func(self, func: Callable, is_apply_func: bool = False) -> Callable:
+    def _get_map_funcs(self) -> Union[Tuple[Callable, Callable], Tuple[None, None]]:
+        """
+        Determine what functions to call for the current map parameters, for chunks of tasks without and with order
+        index, respectively
+
+        :return: Functions to call, or None when the workers were started before any map call
+        """
+        if self.map_params.func is None:
+            return None, None
+        return self._get_func(self.map_params.func), self._get_func(self.map_params.func, keep_order=True)
+
+    def _get_func(self, func: Callable, keep_order: bool = False) -> Callable:
         """
         Determine what function to call. If we have to keep in mind the order (for map) we use the helper function with
-        idx support which deals with the provided idx variable. However, if we are dealing with an apply function, we
-        ignore this as it doesn't matter.
+        idx support which deals with the provided idx variable.
 
         :param func: Function to call
-        :param is_apply_func: Whether this is an apply function
+        :param keep_order: Whether to keep order in mind
         :return: Function to call
         """
-        helper_func = (self._helper_func_with_idx if not is_apply_func and self.worker_comms.keep_order() else
-                       self._helper_func)
-        return partial(helper_func, partial(func, *self.additional_args))
+        helper_func = self._helper_func_with_idx if keep_order else self._helper_func
+        return partial(helper_func, partial(func, *self.additional_args) if self.additional_args else func)
 
     def _handle_poison_pill(self, lethal: bool, n_tasks_executed: int) -> None:
         """
@@ -318,6 +424,7 @@ class AbstractWorker:
 
         :param lethal: Whether this is a lethal poison pill
         """
+        self._send_results()
         self._update_task_insights(force_update=True)
         self._update_progress_bar(force_update=True)
         self.worker_comms.task_done(self.worker_id)
@@ -327,11 +434,12 @@ class AbstractWorker:
             if self.map_params.progress_bar:
                 self.worker_comms.wait_until_progress_bar_is_complete()
 
-    def _handle_new_map_params(self) -> Optional[Callable]:
+    def _handle_new_map_params(self) -> bool:
         """
-        Handle new map parameters. This means we need to update the map parameters and get the new function to call.
+        Handle new map parameters. This means we need to update the map parameters. The new functions to call can be
+        obtained using ``_get_map_funcs`` afterwards.
 
-        :return: Function to call
+        :return: Whether the new map parameters were obtained
         """
         self.worker_comms.task_done(self.worker_id)
         map_params = self.worker_comms.get_task(self.worker_id)
@@ -339,12 +447,11 @@ class AbstractWorker:
         # It can happen that at the moment we get a new map params pill, an exception occurred in another process.
         # Therefore, get_task will return None
         if map_params is None:
-            return None
+            return False
 
         self.map_params = map_params
-        func = self._get_func(self.map_params.func)
         self.worker_comms.task_done(self.worker_id)
-        return func
+        return True
 
     def _handle_apply_pill(self) -> Union[Tuple[Callable, Any], Tuple[None, None]]:
         """
@@ -362,8 +469,8 @@ class AbstractWorker:
             return None, None
 
         job_id, (apply_func, args) = task
-        func = self._get_func(apply_func, is_apply_func=True)
-        next_chunked_args = job_id, (args,)
+        func = self._get_func(apply_func)
+        next_chunked_args = job_id, (None, False, (args,))
 
         return func, next_chunked_args
 
@@ -414,7 +521,13 @@ class AbstractWorker:
         def _func():
             with TimeIt(self.worker_insights.worker_working_time, self.worker_id, self.max_task_duration_list,
                         lambda: self._format_args(args, separator=' | ')):
-                _results = func(*args) if self.is_apply_func else func(args)
+                if self.is_apply_func:
+                    _results = func(*args)
+                elif self.chunk_uses_shared_memory:
+                    _results = func(load_shared_numpy_arrays(args, self.shared_memory_class,
+                                                             self.shared_memory_blocks))
+                else:
+                    _results = func(args)
             self.worker_insights.update_n_completed_tasks(self.worker_id)
             return _results
 
@@ -453,9 +566,86 @@ class AbstractWorker:
         if should_shut_down:
             return True
         elif send_results:
-            self.worker_comms.add_results(self.worker_id, [(EXIT_FUNC, True, results)])
+            with self.results_buffer_lock:
+                self.worker_comms.add_results(self.worker_id, [(EXIT_FUNC, True, results)])
         return False
 
+    def _add_results(self, results: List[Tuple[Optional[int], bool, Any]], send: bool = False) -> None:
+        """
+        Add the results of a chunk of tasks to the results buffer. The buffer is sent to the main process right away
+        when buffering isn't enabled. Otherwise, it's sent when it contains enough chunks, when it has been a while
+        since results were last sent, or when there's no new chunk of tasks readily available
+
+        :param results: A list of tuples of job ID, success bool, and output from the worker
+        :param send: Whether to send the buffer right away
+        """
+        with self.results_buffer_lock:
+            self.results_buffer.extend(results)
+            self.results_buffer_n_chunks += 1
+            send = (send or not self.map_params.buffer_results or
+                    self.results_buffer_n_chunks >= self.results_buffer_max_chunks or
+                    (time.time() - self.results_buffer_last_sent) > self.results_buffer_max_interval or
+                    not self.worker_comms.task_available(self.worker_id))
+        if send:
+            self._send_results()
+
+    def _send_results(self, close_blocks: bool = True) -> None:
+        """
+        Send the buffered results to the main process
+
+        :param close_blocks: Whether to try to close the shared memory blocks afterwards. Only the thread running the
+            tasks can do this, as it's the one opening them
+        """
+        pickle_error = None
+        with self.results_buffer_lock:
+            if self.results_buffer:
+                # Results are pickled in the worker itself, so we can catch it when results can't be pickled and pass it
+                # on to the main process
+                try:
+                    self.worker_comms.add_results(self.worker_id, self.results_buffer, self.results_buffer_n_chunks)
+                except (pickle.PicklingError, TypeError, AttributeError) as err:
+                    pickle_error = err
+                self.results_buffer = []
+                self.results_buffer_n_chunks = 0
+                self.results_buffer_last_sent = time.time()
+        if pickle_error is not None:
+            self._raise(self.last_job_id, None, pickle_error)
+            raise StopWorker
+
+        # The results could contain (views of) numpy arrays stored in shared memory. Now they've been sent, we can try
+        # to close the shared memory blocks
+        if close_blocks and self.shared_memory_blocks:
+            self.shared_memory_blocks = close_shared_memory(self.shared_memory_blocks)
+
+    def _flush_results_periodically(self) -> None:
+        """
+        Send the buffered results to the main process when they have been waiting for longer than
+        ``results_buffer_max_interval``. This runs in a separate thread, such that buffered results don't have to wait
+        for the next chunk of tasks to finish. Exceptions from signal handlers are passed on as well
+        """
+        timeout = self.results_buffer_max_interval
+        while True:
+            self.results_flusher_event.wait(timeout)
+            self.results_flusher_event.clear()
+            if self.results_flusher_exception is not None:
+                self._raise(*self.results_flusher_exception)
+                self.results_flusher_exception = None
+            if self.results_flusher_stop:
+                return
+
+            # Wake up again when the current buffer is due
+            with self.results_buffer_lock:
+                timeout = self.results_buffer_last_sent + self.results_buffer_max_interval - time.time()
+                send = timeout <= 0 and bool(self.results_buffer)
+            if timeout <= 0:
+                timeout = self.results_buffer_max_interval
+            if send:
+                try:
+                    self._send_results(close_blocks=False)
+                except StopWorker:
+                    # The exception has been passed on to the main process already
+                    return
+
     def _run_safely(
         self, func: Callable, job_id: Optional[int], exception_args: Optional[Any] = None
     ) -> Tuple[Any, bool, bool, bool]:
@@ -528,7 +718,8 @@ class AbstractWorker:
             exception = self._get_exception(args, err)
 
             # Add exception
-            self.worker_comms.add_results(self.worker_id, [(job_id, False, exception)])
+            with self.results_buffer_lock:
+                self.worker_comms.add_results(self.worker_id, [(job_id, False, exception)])
 
     def _get_exception(self, args: Optional[Any], err: Union[Exception, SystemExit]) -> Tuple[type, Tuple, Dict, str]:
         """
@@ -544,8 +735,8 @@ class AbstractWorker:
 
         # Sometimes an exception cannot be pickled (i.e., we get the _pickle.PickleError: Can't pickle
         # <class ...>: it's not the same object as ...). We check that here by trying the pickle.dumps manually.
-        # The call to `queue.put` creates a thread in which it pickles and when that raises an exception we
-        # cannot catch it.
+        # Results are pickled before they are sent to the main process, and when that raises an exception we have no way
+        # of passing it on.
         try:
             pickle.dumps(type(err))
             pickle.dumps(err.args)
@@ -567,7 +758,7 @@ class AbstractWorker:
         if self.is_apply_func:
             func_args, func_kwargs = args
         else:
-            func_args = args[1] if args and self.worker_comms.keep_order() else args
+            func_args = args[1] if args and self.keep_order else args
             func_kwargs = None
 
         func_args, func_kwargs = self._convert_args_kwargs(func_args, func_kwargs)
@@ -581,37 +772,34 @@ class AbstractWorker:
 
     def _helper_func_with_idx(self, func: Callable, args: Tuple[int, Any]) -> Tuple[int, Any]:
         """
-        Helper function which calls the function `func` but preserves the order index
+        Helper function which calls the function `func` but preserves the order index. Tuples of arguments are unpacked
+        directly, as that's the most common case. Other arguments are converted first
 
         :param func: Function to call each time new task arguments become available
         :param args: Tuple of ``(idx, _args)`` where ``_args`` correspond to the arguments to pass on to the function.
             ``idx`` is used to preserve order
         :return: (idx, result of calling the function with the given arguments) tuple
         """
-        return args[0], self._call_func(func, args[1])
+        idx, args = args
+        if type(args) is tuple:
+            return idx, func(*args)
+        args, kwargs = self._convert_args_kwargs(args)
+        return idx, func(*args, **kwargs)
 
     def _helper_func(self, func: Callable, args: Any, kwargs: Optional[Dict] = None) -> Any:
         """
-        Helper function which calls the function `func`
-
-        :param func: Function to call each time new task arguments become available
-        :param args: Arguments to pass on to the function
-        :param kwargs: Keyword arguments to pass to the function
-        :return: Result of calling the function with the given arguments) tuple
-        """
-        return self._call_func(func, args, kwargs)
-
-    def _call_func(self, func: Callable, args: Any, kwargs: Optional[Dict] = None) -> Any:
-        """
-        Helper function which calls the function `func` and passes the arguments in the correct way
+        Helper function which calls the function `func` and passes the arguments in the correct way. Tuples of arguments
+        are unpacked directly, as that's the most common case. Other arguments are converted first
 
         :param func: Function to call each time new task arguments become available
         :param args: Arguments to pass on to the function. If this is a dictionary and kwargs is not provided, then
             these args will be treated as keyword arguments. If this is an iterable, then the arguments will be
             unpacked.
         :param kwargs: Keyword arguments to pass to the function
-        :return: Result of calling the function with the given arguments) tuple
+        :return: Result of calling the function with the given arguments
         """
+        if kwargs is None and type(args) is tuple:
+            return func(*args)
         args, kwargs = self._convert_args_kwargs(args, kwargs)
         return func(*args, **kwargs)
 
@@ -2,6 +2,7 @@ import itertools
 import queue
 import time
 import unittest
+from threading import Timer
 from unittest.mock import patch, Mock
 
 from mpire.async_result import (AsyncResult, AsyncResultWithExceptionGetter, UnorderedAsyncExitResultIterator,
@@ -247,6 +248,41 @@ class UnorderedAsyncResultIteratorTest(unittest.TestCase):
         with self.assertRaises(StopIteration):
             next(r)
 
+    def test_next_batch(self):
+        """
+        Test that the next_batch method returns all available values
+        """
+        r = UnorderedAsyncResultIterator({}, 3, None, None)
+        r._set(True, 42)
+        r._set(True, 1337)
+        self.assertListEqual(r.next_batch(), [42, 1337])
+        self.assertEqual(r._n_returned, 2)
+        r._set(True, 0)
+        self.assertListEqual(r.next_batch(), [0])
+        self.assertEqual(r._n_returned, 3)
+        with self.assertRaises(StopIteration):
+            r.next_batch()
+
+    def test_next_batch_timeout(self):
+        """
+        Test that the next_batch method returns an empty list if the timeout is exceeded
+        """
+        r = UnorderedAsyncResultIterator({}, None, None, None)
+        start_t = time.time()
+        self.assertListEqual(r.next_batch(block=True, timeout=0.001), [])
+        self.assertGreaterEqual(time.time() - start_t, 0.001)
+        self.assertListEqual(r.next_batch(block=False), [])
+
+    def test_next_batch_exception(self):
+        """
+        Test that the next_batch method stops waiting when the task failed
+        """
+        r = UnorderedAsyncResultIterator({}, None, None, None)
+        Timer(0.01, r._set, args=(False, ValueError('test'))).start()
+        start_t = time.time()
+        self.assertListEqual(r.next_batch(block=True, timeout=5), [])
+        self.assertLess(time.time() - start_t, 1)
+
     def test_set_success(self):
         """
         Test that the _set method sets the correct values if the task has succeeded
@@ -261,6 +297,27 @@ class UnorderedAsyncResultIteratorTest(unittest.TestCase):
         r._set(True, 0)
         self.assertEqual(list(r._items), [42, 1337, 0])
 
+    def test_set_batch(self):
+        """
+        Test that the _set_batch method adds all results at once and wakes up anyone waiting for them
+        """
+        r = UnorderedAsyncResultIterator({}, 5, None, None)
+        r._set(True, 42)
+        r._set_batch([1337, 0])
+        self.assertEqual(r._n_received, 3)
+        self.assertEqual(list(r._items), [42, 1337, 0])
+        self.assertEqual(r.next_batch(block=False), [42, 1337, 0])
+
+        # Results added from another thread should wake up the main thread right away
+        timer = Timer(0.1, r._set_batch, args=([1, 2],))
+        timer.start()
+        start_t = time.time()
+        self.assertEqual(r.next_batch(block=True, timeout=5), [1, 2])
+        self.assertLess(time.time() - start_t, 1)
+        timer.join()
+        with self.assertRaises(StopIteration):
+            r.next_batch()
+
     def test_set_exception(self):
         """
         Test that the _set method sets the exception if the task has failed
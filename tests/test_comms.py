@@ -1,5 +1,6 @@
 import ctypes
 import multiprocessing as mp
+import pickle
 import queue
 import threading
 import unittest
@@ -43,8 +44,7 @@ class WorkerCommsTest(unittest.TestCase):
                 self.assertEqual(comms.n_jobs, n_jobs)
                 self.assertEqual(comms.order_tasks, order_tasks)
                 self.assertFalse(comms.is_initialized())
-                self.assertIsInstance(comms._keep_order, value_type)
-                self.assertFalse(comms._keep_order.value)
+                self.assertFalse(comms._keep_order)
                 self.assertIsInstance(comms._task_queues, list)
                 self.assertEqual(len(comms._task_queues), 0)
                 self.assertIsNone(comms._task_idx)
@@ -53,9 +53,14 @@ class WorkerCommsTest(unittest.TestCase):
                 self.assertIsInstance(comms._last_completed_task_worker_id, deque)
                 self.assertEqual(len(comms._last_completed_task_worker_id), 0)
                 self.assertIsNone(comms._worker_working_on_job)
-                self.assertIsNone(comms._results_queue)
-                self.assertIsInstance(comms._results_added, list)
-                self.assertEqual(len(comms._results_added), 0)
+                self.assertListEqual(comms._results_readers, [])
+                self.assertListEqual(comms._results_writers, [])
+                self.assertIsNone(comms._main_results_reader)
+                self.assertIsNone(comms._main_results_writer)
+                self.assertIsNone(comms._results_read_lock)
+                self.assertIsInstance(comms._results_readers_ready, deque)
+                self.assertEqual(len(comms._results_readers_ready), 0)
+                self.assertIsNone(comms._results_added)
                 self.assertIsNone(comms._results_received)
                 self.assertIsNone(comms._worker_restart_array)
                 self.assertIsInstance(comms._worker_restart_condition, condition_type)
@@ -86,7 +91,8 @@ class WorkerCommsTest(unittest.TestCase):
                 comms._worker_running_task[i].value = i % 2 == 0
             for i in range(n_jobs):
                 comms._worker_working_on_job[i] = i + 1
-            comms._results_added = [i + 1 for i in range(n_jobs)]
+            for i in range(n_jobs):
+                comms._results_added[i] = i + 1
             for i in range(n_jobs):
                 comms._results_received[i] = i + 1
             for i in range(n_jobs):
@@ -124,6 +130,11 @@ class WorkerCommsTest(unittest.TestCase):
         array_type = type(comms.ctx.Array('i', n_jobs, lock=True))
         event_type = type(comms.ctx.Event())
         joinable_queue_type = type(comms.ctx.JoinableQueue())
+        lock_type = type(comms.ctx.Lock())
+        reader, writer = comms.ctx.Pipe(duplex=False)
+        connection_type = type(reader)
+        reader.close()
+        writer.close()
         rlock_type = type(comms.ctx.RLock())
         value_type = type(comms.ctx.Value('i', 0, lock=True))
 
@@ -138,9 +149,16 @@ class WorkerCommsTest(unittest.TestCase):
             self.assertIsInstance(v.get_lock(), rlock_type)
         self.assertIsInstance(comms._worker_working_on_job, array_type)
         self.assertEqual(len(comms._worker_working_on_job), n_jobs)
-        self.assertIsInstance(comms._results_queue, joinable_queue_type)
-        self.assertIsInstance(comms._results_added, list)
+        self.assertEqual(len(comms._results_readers), n_jobs)
+        self.assertEqual(len(comms._results_writers), n_jobs)
+        for connection in comms._results_readers + comms._results_writers:
+            self.assertIsInstance(connection, connection_type)
+        self.assertIsInstance(comms._main_results_reader, connection_type)
+        self.assertIsInstance(comms._main_results_writer, connection_type)
+        self.assertIsInstance(comms._results_read_lock, lock_type)
+        self.assertEqual(len(comms._results_readers_ready), 0)
         self.assertEqual(len(comms._results_added), n_jobs)
+        self.assertListEqual(list(comms._results_added), [0] * n_jobs)
         self.assertIsInstance(comms._results_received, array_type)
         self.assertEqual(len(comms._results_received), n_jobs)
         self.assertIsInstance(comms._worker_restart_array, array_type)
@@ -275,6 +293,7 @@ class WorkerCommsTest(unittest.TestCase):
 
         # Nothing available yet
         for worker_id in range(3):
+            self.assertFalse(comms.task_available(worker_id))
             with self.assertRaises(queue.Empty):
                 comms._task_queues[worker_id].get(block=False)
 
@@ -286,6 +305,9 @@ class WorkerCommsTest(unittest.TestCase):
         comms.add_task(job_id, {'foo': 'baz'})
         comms.add_task(job_id, 34.43)
         comms.add_task(job_id, datetime(2000, 1, 1, 1, 2, 3))
+        for worker_id in range(3):
+            self._wait_for_task(comms, worker_id)
+            self.assertTrue(comms.task_available(worker_id))
         tasks = []
         for worker_id in [0, 1, 2, 0, 1, 2]:
             tasks.append(comms.get_task(worker_id))
@@ -333,6 +355,60 @@ class WorkerCommsTest(unittest.TestCase):
         # Should be joinable
         comms.join_task_queues()
 
+    def test_task_buffers(self):
+        """
+        Test buffering tasks and processing batches of tasks
+        """
+        comms = WorkerComms(MP_CONTEXTS['mp'][DEFAULT_START_METHOD], 2, True)
+        comms.init_comms()
+
+        # Buffered tasks shouldn't be added to the task queues until the buffer of a worker is full
+        job_id = 0
+        with patch.object(comms, 'task_buffer_max_chunks', 3):
+            for task in range(4):
+                comms.buffer_task(job_id, task)
+            self.assertListEqual(comms._task_buffers, [[(job_id, 0), (job_id, 2)], [(job_id, 1), (job_id, 3)]])
+            self.assertFalse(comms._task_queues[0]._reader.poll(0.1))
+            self.assertFalse(comms._task_queues[1]._reader.poll(0.1))
+            self.assertFalse(comms.task_available(0))
+            self.assertFalse(comms.task_available(1))
+
+            # Both buffers become full, so they should have been flushed
+            for task in range(4, 7):
+                comms.buffer_task(job_id, task)
+            self.assertListEqual(comms._task_buffers, [[(job_id, 6)], []])
+            for worker_id in range(2):
+                self._wait_for_task(comms, worker_id)
+                self.assertTrue(comms.task_available(worker_id))
+
+            # Flush the remaining buffer. A single task is added to the queue as is
+            comms.flush_task_buffers()
+            self.assertListEqual(comms._task_buffers, [[], []])
+
+        # Tasks from a batch should be returned one by one. As a batch is a single item in the queue, only the last
+        # task_done call is passed on to the queue
+        for worker_id, expected_tasks in [(0, [0, 2, 4, 6]), (1, [1, 3, 5])]:
+            with self.subTest(worker_id=worker_id):
+                tasks = []
+                for _ in expected_tasks:
+                    self._wait_for_task(comms, worker_id)
+                    self.assertTrue(comms.task_available(worker_id))
+                    tasks.append(comms.get_task(worker_id))
+                    comms.task_done(worker_id)
+                self.assertListEqual(tasks, [(job_id, task) for task in expected_tasks])
+                self.assertFalse(comms.task_available(worker_id))
+                self.assertEqual(comms._n_task_done_skip[worker_id], 0)
+
+        # Should be joinable
+        comms.join_task_queues()
+
+    def _wait_for_task(self, comms: WorkerComms, worker_id: int, timeout: float = 5.0) -> None:
+        """
+        Waits until a task is available for a worker. Tasks are added to the queues by a feeder thread, so it can take
+        a moment before they arrive
+        """
+        self.assertTrue(comms._task_batches[worker_id] or comms._task_queues[worker_id]._reader.poll(timeout))
+
     def test_worker_running_task(self):
         """
         Tests that the worker_running_task functions work as expected
@@ -387,9 +463,11 @@ class WorkerCommsTest(unittest.TestCase):
 
         # Nothing available yet
         with self.assertRaises(queue.Empty):
-            comms._results_queue.get(block=False)
+            comms.get_results(block=False)
+        with self.assertRaises(queue.Empty):
+            comms.get_results(block=True, timeout=0.01)
 
-        # Add a few results. Note that `get_results` calls `task_done`
+        # Add a few results. Each worker has its own pipe, so results are obtained in a round-robin fashion
         comms.add_results(0, [(0, True, 12)])
         comms.add_results(1, [(1, True, 'hello world')])
         comms.add_results(1, [(1, False, {'foo': 'bar'})])
@@ -398,20 +476,61 @@ class WorkerCommsTest(unittest.TestCase):
         self.assertEqual(comms._last_completed_task_worker_id.popleft(), 0)
         self.assertEqual(comms.get_results(), [(1, True, 'hello world')])
         self.assertEqual(comms._last_completed_task_worker_id.popleft(), 1)
-        self.assertEqual(comms.get_results(), [(1, False, {'foo': 'bar'})])
-        self.assertEqual(comms._last_completed_task_worker_id.popleft(), 1)
         self.assertEqual(comms.get_results(), [(2, True, '123')])
         self.assertEqual(comms._last_completed_task_worker_id.popleft(), 0)
+        self.assertEqual(comms.get_results(), [(1, False, {'foo': 'bar'})])
+        self.assertEqual(comms._last_completed_task_worker_id.popleft(), 1)
 
-        # Should be joinable. When using keep_alive, it should still be open
-        comms.join_results_queues(keep_alive=True)
-        comms.add_results(0, [(2, True, 12)])
-        comms.get_results()
-        comms.join_results_queues(keep_alive=False)
+        # Results of multiple chunks can be sent at once. The worker ID should be added for each chunk
+        comms.add_results(1, [(3, True, 'foo'), (3, True, 'bar'), (3, True, 'baz')], n_chunks=2)
+        self.assertEqual(comms.get_results(), [(3, True, 'foo'), (3, True, 'bar'), (3, True, 'baz')])
+        self.assertListEqual(list(comms._last_completed_task_worker_id), [1, 1])
+        comms._last_completed_task_worker_id.clear()
+
+        # Number of results added and received should match
+        self.assertListEqual(list(comms._results_added), [2, 3])
+        self.assertListEqual(list(comms._results_received), [2, 3])
+        comms.wait_until_all_results_received()
+
+        # Results that can't be pickled should raise immediately and shouldn't be counted
+        with self.assertRaises((pickle.PicklingError, TypeError, AttributeError)):
+            comms.add_results(0, [(4, True, threading.Lock())])
+        self.assertListEqual(list(comms._results_added), [2, 3])
+
+        # Resetting should reset both the added and received counters
+        comms.reset_results_received(1)
+        self.assertListEqual(list(comms._results_added), [2, 0])
+        self.assertListEqual(list(comms._results_received), [2, 0])
+
+        # Results from the main process are sent over a separate pipe and aren't counted
+        comms.add_results(None, [(None, True, 'main')])
+        self.assertEqual(comms.get_results(), [(None, True, 'main')])
+        self.assertListEqual(list(comms._results_added), [2, 0])
+        self.assertListEqual(list(comms._results_received), [2, 0])
+        self.assertEqual(len(comms._last_completed_task_worker_id), 0)
 
-        # Depending on Python version it either throws AssertionError or ValueError
-        with self.assertRaises((AssertionError, ValueError)):
+        # After closing the pipes we can't send results anymore
+        comms.close_results_pipes()
+        with self.assertRaises(OSError):
             comms.add_results(0, [(2, True, 12)])
+        with self.assertRaises(OSError):
+            comms.add_results(None, [(None, True, 'main')])
+
+    def test_results_round_robin(self):
+        """
+        When multiple results pipes are ready, they should be read from in a round-robin fashion, such that a single
+        worker can't starve the others
+        """
+        comms = WorkerComms(MP_CONTEXTS['mp'][DEFAULT_START_METHOD], 3, False)
+        comms.init_comms()
+
+        for _ in range(3):
+            comms.add_results(0, [(0, True, 0)])
+        comms.add_results(2, [(0, True, 2)])
+        comms.add_results(1, [(0, True, 1)])
+        self.assertListEqual([comms.get_results()[0][2] for _ in range(5)], [0, 1, 2, 0, 0])
+        with self.assertRaises(queue.Empty):
+            comms.get_results(block=False)
 
     def test_add_new_map_params(self):
         """
@@ -573,15 +692,19 @@ class WorkerCommsTest(unittest.TestCase):
 
     def test_drain_queues(self):
         """
-        _drain_and_join_queue should be called for every queue that matters. There are as many tasks queues as workers
-        and 1 results queue
+        _drain_and_join_queue should be called for every queue that matters. There are as many tasks queues as workers.
+        The results pipes are closed
         """
         for n_jobs in [1, 2, 4]:
             comms = WorkerComms(MP_CONTEXTS['mp'][DEFAULT_START_METHOD], n_jobs, False)
             comms.init_comms()
             with self.subTest(n_jobs=n_jobs), patch.object(comms, 'drain_and_join_queue') as p:
                 comms.drain_queues()
-                self.assertEqual(p.call_count, n_jobs + 1)
+                self.assertEqual(p.call_count, n_jobs)
+                for connection in comms._results_readers + comms._results_writers:
+                    self.assertTrue(connection.closed)
+                self.assertTrue(comms._main_results_reader.closed)
+                self.assertTrue(comms._main_results_writer.closed)
 
     def test__drain_and_join_queue(self):
         """
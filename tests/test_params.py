@@ -35,6 +35,22 @@ class WorkerPoolParamsTest(unittest.TestCase):
                 with self.subTest(n_jobs=n_jobs):
                     self.assertEqual(WorkerPoolParams(n_jobs, None).n_jobs, expected_njobs)
 
+    def test_min_shm_size(self):
+        """
+        Check min_shm_size parameter. Should raise when wrong parameter values are used.
+        """
+        for min_shm_size in [None, 1, 64 * 1024]:
+            with self.subTest(min_shm_size=min_shm_size), patch('mpire.params.check_number') as p:
+                WorkerPoolParams(None, None, min_shm_size=min_shm_size)
+                min_shm_size_call = [call for call in p.call_args_list if call[0][1] == 'min_shm_size'][0]
+                args, kwargs = min_shm_size_call[0], min_shm_size_call[1]
+                self.assertEqual(args[0], min_shm_size)
+                self.assertDictEqual(kwargs, {"allowed_types": (int,), "none_allowed": True, "min_": 1})
+
+        for min_shm_size, error in [(1.5, TypeError), ('3', TypeError), (0, ValueError), (-1, ValueError)]:
+            with self.subTest(min_shm_size=min_shm_size), self.assertRaises(error):
+                WorkerPoolParams(None, None, min_shm_size=min_shm_size)
+
     def test_check_cpu_ids_valid_input(self):
         """
         Test that when the parameters are valid, they are converted to the correct cpu ID mask
@@ -74,6 +90,23 @@ class WorkerPoolParamsTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             WorkerPoolParams(n_jobs=1, cpu_ids=[cpu_count()])
 
+        # Only 'auto' is allowed as string
+        with self.assertRaises(ValueError):
+            WorkerPoolParams(n_jobs=1, cpu_ids='all')
+
+    def test_check_cpu_ids_auto(self):
+        """
+        Test that each child process is pinned to a single available CPU, in a round-robin fashion
+        """
+        for n_jobs, available_cpu_ids, expected_mask in [(1, {0, 1, 2, 3}, [[0]]),
+                                                         (4, {0, 1, 2, 3}, [[0], [1], [2], [3]]),
+                                                         (3, {5, 2}, [[2], [5], [2]]),
+                                                         (None, {1}, [[1]] * cpu_count())]:
+            with self.subTest(n_jobs=n_jobs, available_cpu_ids=available_cpu_ids), \
+                    patch('os.sched_getaffinity', return_value=available_cpu_ids, create=True):
+                params = WorkerPoolParams(n_jobs=n_jobs, cpu_ids='auto')
+                self.assertListEqual(params.cpu_ids, expected_mask)
+
 
 class WorkerMapParamsTest(unittest.TestCase):
 
@@ -115,6 +148,7 @@ class WorkerMapParamsTest(unittest.TestCase):
             self.assertNotEqual(params, WorkerMapParams(self._f1, self._init1, self._exit1, 42, True, 2, 2, 3))
             self.assertNotEqual(params, WorkerMapParams(self._f1, self._init1, self._exit1, 42, True, 1, 3, 3))
             self.assertNotEqual(params, WorkerMapParams(self._f1, self._init1, self._exit1, 42, True, 1, 2, 4))
+            self.assertNotEqual(params, WorkerMapParams(self._f1, self._init1, self._exit1, 42, True, 1, 2, 3, True))
 
     @staticmethod
     def _init1():
@@ -1,13 +1,14 @@
 import io
 import os
+import pickle
 import time
 import types
 import unittest
 import warnings
 from contextlib import redirect_stderr, redirect_stdout
 from itertools import product, repeat
-from multiprocessing import Barrier, Value
-from threading import current_thread, main_thread, Thread
+from multiprocessing import Barrier, Pipe, Value
+from threading import current_thread, Lock, main_thread, Thread
 from unittest.mock import Mock, patch
 
 import numpy as np
@@ -40,6 +41,10 @@ def subtract(x, y):
     return x - y
 
 
+def get_shared_memory_blocks():
+    return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')} if os.path.isdir('/dev/shm') else set()
+
+
 class MapTest(unittest.TestCase):
 
     def setUp(self):
@@ -123,6 +128,22 @@ class MapTest(unittest.TestCase):
                         self.assertIsInstance(results_list, result_type)
                         self.assertEqual(len(self.test_desired_output), len(list(results_list)))
 
+    def test_iterable_len_mismatch(self):
+        """
+        The ordered map function should return the correct results when the number of tasks is unknown or when it is
+        smaller than the number of elements in the iterable
+        """
+        def get_generator(iterable):
+            yield from iterable
+
+        with WorkerPool(n_jobs=2) as pool:
+            for iterable_len, chunk_size, n_results in [(None, 3, self.test_data_len),
+                                                        (self.test_data_len - 5, None, self.test_data_len - 5)]:
+                with self.subTest(iterable_len=iterable_len, chunk_size=chunk_size):
+                    self.assertListEqual(pool.map(square, get_generator(self.test_data), iterable_len=iterable_len,
+                                                  chunk_size=chunk_size),
+                                         self.test_desired_output[:n_results])
+
     def test_numpy_input(self):
         """
         Test map with numpy input
@@ -190,6 +211,85 @@ class MapTest(unittest.TestCase):
                                 self.test_desired_output_numpy[np.lexsort(self.test_desired_output_numpy.T)]
                             )
 
+    def test_numpy_shared_memory(self):
+        """
+        Test map with large numpy arrays, which are passed on using shared memory. Results that are (views of) the
+        arrays in shared memory should be returned correctly and no shared memory blocks should be left behind
+        """
+        test_data = np.random.rand(256, 1024)
+        print()
+        for start_method, min_shm_size in tqdm(list(product(TEST_START_METHODS, [None, 1024]))):
+            shared_memory_blocks_before = get_shared_memory_blocks()
+
+            with self.subTest(start_method=start_method, min_shm_size=min_shm_size, map='numpy input'), \
+                    WorkerPool(2, start_method=start_method, min_shm_size=min_shm_size) as pool:
+                results = pool.map(square_numpy, test_data, chunk_size=16)
+                np.testing.assert_array_equal(results, square_numpy(test_data))
+
+            with self.subTest(start_method=start_method, min_shm_size=min_shm_size, map='views as output'), \
+                    WorkerPool(2, start_method=start_method, min_shm_size=min_shm_size) as pool:
+                results = pool.map(self._first_row, [(idx, test_data[idx:idx + 16]) for idx in range(0, 256, 16)],
+                                   concatenate_numpy_output=False)
+                for idx, result in zip(range(0, 256, 16), results):
+                    np.testing.assert_array_equal(result, test_data[idx])
+
+            with self.subTest(start_method=start_method, min_shm_size=min_shm_size, map='list input'), \
+                    WorkerPool(2, start_method=start_method, min_shm_size=min_shm_size) as pool:
+                results = pool.map(self._sum_arrays, [[test_data[idx:idx + 16], test_data[idx + 16:idx + 32]]
+                                                      for idx in range(0, 256, 32)], concatenate_numpy_output=False)
+                for idx, result in zip(range(0, 256, 32), results):
+                    np.testing.assert_array_equal(result, test_data[idx:idx + 16] + test_data[idx + 16:idx + 32])
+
+            with self.subTest(start_method=start_method, min_shm_size=min_shm_size, map='nested keyword arguments'), \
+                    WorkerPool(2, start_method=start_method, min_shm_size=min_shm_size) as pool:
+                results = pool.map(self._sum_nested, [{'x': (test_data[idx:idx + 16], 1),
+                                                       'y': {'z': test_data[idx + 16:idx + 32]}}
+                                                      for idx in range(0, 256, 32)], concatenate_numpy_output=False)
+                for idx, result in zip(range(0, 256, 32), results):
+                    np.testing.assert_array_equal(result, test_data[idx:idx + 16] + 1 + test_data[idx + 16:idx + 32])
+
+            with self.subTest(start_method=start_method, min_shm_size=min_shm_size, map='connection argument'), \
+                    WorkerPool(2, start_method=start_method, min_shm_size=min_shm_size) as pool:
+                reader, writer = Pipe(duplex=False)
+                pool.map(self._send, [(writer, 1)])
+                self.assertTrue(reader.poll(5))
+                self.assertEqual(reader.recv(), 1)
+
+            with self.subTest(start_method=start_method, min_shm_size=min_shm_size, map='exception'), \
+                    WorkerPool(2, start_method=start_method, min_shm_size=min_shm_size) as pool, \
+                    self.assertRaises(ValueError):
+                pool.map(self._raise_on_negative, np.concatenate([test_data, -test_data]), chunk_size=16)
+
+            self.assertSetEqual(get_shared_memory_blocks() - shared_memory_blocks_before, set())
+
+    @staticmethod
+    def _first_row(_, x):
+        return x[0]
+
+    @staticmethod
+    def _sum_arrays(x, y):
+        return x + y
+
+    @staticmethod
+    def _sleep(x):
+        time.sleep(x)
+        return x
+
+    @staticmethod
+    def _sum_nested(x, y):
+        return x[0] + x[1] + y['z']
+
+    @staticmethod
+    def _send(conn, x):
+        conn.send(x)
+
+    @staticmethod
+    def _raise_on_negative(x):
+        if (x < 0).any():
+            raise ValueError("Negative values")
+        time.sleep(0.01)
+        return x
+
     def test_dictionary_input(self):
         """
         Test map with dictionary input
@@ -253,6 +353,18 @@ class MapTest(unittest.TestCase):
             with self.assertRaises(RuntimeError):
                 next(pool.imap(square, self.test_data))
 
+    def test_results_not_delayed(self):
+        """
+        Results that are buffered by a worker should be sent to the main process in time, even when the next chunk of
+        tasks takes a long time. Results are only buffered when max_tasks_active is large enough
+        """
+        with WorkerPool(1) as pool:
+            start_t = time.time()
+            imap_results = pool.imap(self._sleep, [0.01, 1, 0.01], chunk_size=1, max_tasks_active=100)
+            self.assertEqual(next(imap_results), 0.01)
+            self.assertLess(time.time() - start_t, 0.5)
+            self.assertListEqual(list(imap_results), [1, 0.01])
+
     def test_terminate(self):
         """
         When a lazy map call is running and the pool is terminated, exhausting the results should raise
@@ -422,6 +534,19 @@ class ApplyAsyncTest(unittest.TestCase):
             event.set()
             self.assertEqual(first_result.get(), 42)
 
+    def test_results_not_delayed(self):
+        """
+        The result of an apply task shouldn't be held back by a worker while it's running the next task
+        """
+        with WorkerPool(1) as pool:
+            start_t = time.time()
+            first_result = pool.apply_async(time.sleep, (0.1,))
+            second_result = pool.apply_async(time.sleep, (1,))
+            first_result.get()
+            self.assertLess(time.time() - start_t, 0.5)
+            self.assertFalse(second_result.ready())
+            second_result.get()
+
     @staticmethod
     def _square(x):
         return x * x
@@ -544,6 +669,27 @@ class SharedObjectsTest(unittest.TestCase):
                 self.assertListEqual(pool.map(self._f1, (({'1', '2', '3'},) for _ in range(10)), iterable_len=10),
                                      [True] * 10)
 
+    def test_numpy_shared_memory(self):
+        """
+        Large numpy arrays in the shared objects are passed on using shared memory when the workers don't inherit them.
+        The arrays should be read-only in that case, restarted workers should still have access to them, and no shared
+        memory blocks should be left behind
+        """
+        test_data = np.random.rand(256, 1024)
+        for start_method, min_shm_size in product(TEST_START_METHODS, [None, 1024]):
+            shared_memory_blocks_before = get_shared_memory_blocks()
+            read_only = start_method in {'spawn', 'forkserver'} and min_shm_size is not None and not RUNNING_WINDOWS
+
+            with self.subTest(start_method=start_method, min_shm_size=min_shm_size), \
+                    WorkerPool(n_jobs=2, shared_objects=(test_data, 42), start_method=start_method,
+                               min_shm_size=min_shm_size) as pool:
+                for _ in range(2):
+                    results = pool.map(self._f3, range(10), worker_lifespan=2)
+                    self.assertListEqual([result[0] for result in results], [test_data.sum() + 42] * 10)
+                    self.assertListEqual([result[1] for result in results], [not read_only] * 10)
+
+            self.assertSetEqual(get_shared_memory_blocks() - shared_memory_blocks_before, set())
+
     @staticmethod
     def _f1(_sobjects, _args):
         """
@@ -558,6 +704,14 @@ class SharedObjectsTest(unittest.TestCase):
         """
         return True
 
+    @staticmethod
+    def _f3(_sobjects, _):
+        """
+        Function with a numpy array and a number as shared objects
+        """
+        array, number = _sobjects
+        return array.sum() + number, array.flags.writeable
+
 
 class WorkerStateTest(unittest.TestCase):
 
@@ -920,13 +1074,15 @@ class CPUPinningTest(unittest.TestCase):
                                                (2, [[0, 1], [0, 1]], [[0, 1], [0, 1]]),
                                                (4, [0], [[0], [0], [0], [0]]),
                                                (4, [0, 1, 2, 3], [[0], [1], [2], [3]]),
-                                               (4, [[0, 3]], [[0, 3], [0, 3], [0, 3], [0, 3]])]:
+                                               (4, [[0, 3]], [[0, 3], [0, 3], [0, 3], [0, 3]]),
+                                               (2, 'auto', [[0], [1]])]:
             # The test has been designed for a system with at least 4 cores. We'll skip those test cases where the CPU
             # IDs exceed the number of CPUs.
-            if cpu_ids is not None and np.array(cpu_ids).max(initial=0) >= cpu_count():
+            if cpu_ids is not None and np.array(expected_mask).max(initial=0) >= cpu_count():
                 continue
 
             with self.subTest(n_jobs=n_jobs, cpu_ids=cpu_ids), patch('mpire.pool.set_cpu_affinity') as p, \
+                    patch('os.sched_getaffinity', return_value=set(range(cpu_count())), create=True), \
                     WorkerPool(n_jobs=n_jobs, cpu_ids=cpu_ids) as pool:
 
                 # Verify results
@@ -1160,6 +1316,64 @@ class KeepAliveTest(unittest.TestCase):
                                      self.test_desired_output_f1)
                 self.assertEqual(counter.value, n_jobs)
 
+    def test_eager(self):
+        """
+        When eager is set to True the workers should be started right away. The worker_init function provided to the
+        first map call should still be called and the workers should be reused between map calls
+        """
+        for n_jobs in [1, 3]:
+            barrier = Barrier(n_jobs)
+            counter = Value('i', 0)
+            shared = barrier, counter
+            with self.subTest(n_jobs=n_jobs), \
+                    WorkerPool(n_jobs=n_jobs, shared_objects=shared, use_worker_state=True, keep_alive=True,
+                               eager=True) as pool:
+
+                self.assertEqual(len(pool._workers), n_jobs)
+                workers = list(pool._workers)
+
+                self.assertListEqual(pool.map(self._f1, self.test_data, worker_init=self._init1),
+                                     self.test_desired_output_f1)
+                self.assertEqual(counter.value, n_jobs)
+                barrier.reset()
+
+                self.assertListEqual(pool.map(self._f1, self.test_data, worker_init=self._init1),
+                                     self.test_desired_output_f1)
+                self.assertEqual(counter.value, n_jobs)
+                self.assertListEqual(pool._workers, workers)
+
+    def test_eager_apply(self):
+        """
+        When eager is set to True, the worker_init and worker_exit functions provided to the first apply call should
+        still be called
+        """
+        with WorkerPool(n_jobs=1, use_worker_state=True, eager=True) as pool:
+            self.assertEqual(pool.apply(self._get_state_value, worker_init=self._init_state_value,
+                                        worker_exit=self._get_state_value), 'initialized')
+            pool.stop_and_join()
+            self.assertListEqual(pool.get_exit_results(), ['initialized'])
+
+    @staticmethod
+    def _init_state_value(worker_state):
+        worker_state['value'] = 'initialized'
+
+    @staticmethod
+    def _get_state_value(worker_state):
+        return worker_state.get('value')
+
+    def test_keep_alive_order_change(self):
+        """
+        When keep_alive is set to True and the same function is used for ordered and unordered map functions, the
+        workers should know whether to keep order in mind
+        """
+        desired_output = [x * x for x in self.test_data]
+        with WorkerPool(n_jobs=2, keep_alive=True) as pool:
+            for _ in range(2):
+                self.assertListEqual(pool.map(square_numpy, self.test_data), desired_output)
+                self.assertListEqual(sorted(pool.map_unordered(square_numpy, self.test_data)), sorted(desired_output))
+                self.assertListEqual(list(pool.imap(square_numpy, self.test_data)), desired_output)
+                self.assertListEqual(sorted(pool.imap_unordered(square_numpy, self.test_data)), sorted(desired_output))
+
     def test_keep_alive_map_params_change(self):
         """
         When keep_alive is set to True it should reuse existing workers between map calls, even when the called
@@ -1422,6 +1636,26 @@ class ExceptionTest(unittest.TestCase):
                     pool.map(self._worker_0_sleeps_others_square, range(100), progress_bar=progress_bar,
                              worker_lifespan=worker_lifespan, chunk_size=1)
 
+    def test_defunct_processes_kill_eager(self):
+        """
+        Tests if MPIRE correctly shuts down when a worker that is started eagerly is killed before it has worked on any
+        job
+        """
+        for start_method in TEST_START_METHODS:
+            # Can't kill threads
+            if start_method == 'threading':
+                continue
+
+            with self.subTest(start_method=start_method), self.assertRaises(RuntimeError), \
+                    WorkerPool(n_jobs=2, start_method=start_method, eager=True) as pool:
+                # Wait until the worker has set its signal handlers, which it does before signalling it's alive
+                deadline = time.time() + 10
+                while not pool._worker_comms.is_worker_alive(0) and time.time() < deadline:
+                    time.sleep(0.01)
+                pool._workers[0].terminate()
+                time.sleep(0.5)
+                pool.map(square, list(enumerate(range(10))))
+
     def test_dill_deadlock(self):
         """
         Exceptions on the queue need to be flushed before the worker is terminated. This is one example where it used
@@ -1432,6 +1666,17 @@ class ExceptionTest(unittest.TestCase):
             for _ in pool.imap(lambda x, y, z: x * y / z, data):
                 pass
 
+    def test_unpicklable_results(self):
+        """
+        Results that can't be pickled should raise an exception in the main process instead of causing a deadlock
+        """
+        print()
+        for start_method in TEST_START_METHODS:
+            print(f"========== {start_method} ==========")
+            with self.subTest(start_method=start_method), self.assertRaises((pickle.PicklingError, TypeError)), \
+                    WorkerPool(n_jobs=2, start_method=start_method) as pool:
+                pool.map(self._return_lock, range(10))
+
     @staticmethod
     def _square_raises(_, x):
         raise ValueError(x)
@@ -1447,6 +1692,10 @@ class ExceptionTest(unittest.TestCase):
     def _exit(_):
         exit()
 
+    @staticmethod
+    def _return_lock(_):
+        return Lock()
+
     @staticmethod
     def _worker_0_sleeps_others_square(worker_id, events, x):
         """
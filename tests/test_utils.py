@@ -2,11 +2,15 @@ import types
 import unittest
 from itertools import chain, product
 from multiprocessing import cpu_count
+from multiprocessing.reduction import ForkingPickler
 from unittest.mock import patch
 
 import numpy as np
 
-from mpire.utils import apply_numpy_chunking, chunk_tasks, format_seconds, get_n_chunks, make_single_arguments, TimeIt
+from mpire.context import RUNNING_WINDOWS
+from mpire.utils import (apply_numpy_chunking, chunk_tasks, close_shared_memory, format_seconds, get_n_chunks,
+                         get_shared_memory_class, load_shared_numpy_arrays, make_single_arguments, share_numpy_arrays,
+                         SharedNumpyArray, TimeIt, unlink_shared_memory)
 
 
 class ChunkTasksTest(unittest.TestCase):
@@ -111,6 +115,47 @@ class ChunkTasksTest(unittest.TestCase):
                 self.assertLessEqual(len(chunks[-1]), chunk_size)
                 self.assertEqual(list(range(num_args)), list(chain.from_iterable(chunks)))
 
+    def test_balanced_chunks(self):
+        """
+        When the number of tasks is known and the chunk size is fractional, the tasks should be divided evenly over the
+        chunks, with the larger chunks first. Otherwise, the chunk sizes alternate
+        """
+        for num_args, chunk_size, n_splits, expected_chunk_sizes in [
+            (10, None, 4, [3, 3, 2, 2]), (10, 2.5, None, [3, 3, 2, 2]), (100, 7.3, None, [8, 8] + [7] * 12),
+            (10, None, 3, [4, 3, 3]), (100, None, 3, [34, 33, 33]), (3, 0.5, None, [1, 1, 1]), (9, 3.0, None, [3, 3, 3])
+        ]:
+            for input_type in ['list', 'iterable_len']:
+                with self.subTest(num_args=num_args, chunk_size=chunk_size, n_splits=n_splits, input=input_type):
+                    if input_type == 'list':
+                        chunks = list(chunk_tasks(list(range(num_args)), chunk_size=chunk_size, n_splits=n_splits))
+                    else:
+                        chunks = list(chunk_tasks(iter(range(num_args)), iterable_len=num_args, chunk_size=chunk_size,
+                                                  n_splits=n_splits))
+                    self.assertListEqual([len(chunk) for chunk in chunks], expected_chunk_sizes)
+                    self.assertEqual(list(range(num_args)), list(chain.from_iterable(chunks)))
+
+        # Without a known number of tasks, the chunk sizes alternate
+        chunks = list(chunk_tasks(iter(range(10)), chunk_size=2.5))
+        self.assertListEqual([len(chunk) for chunk in chunks], [3, 2, 3, 2])
+
+    def test_sequence_input(self):
+        """
+        Lists and tuples are sliced instead of iterated over. This should result in the same chunks, as tuples
+        """
+        num_args = 23
+        for input_type, iter_len, chunk_size, n_splits in product([list, tuple], [None, 7, 23, 30], [None, 1, 4],
+                                                                  [None, 3, 5]):
+            if chunk_size is None and n_splits is None:
+                continue
+            with self.subTest(input_type=input_type, iter_len=iter_len, chunk_size=chunk_size, n_splits=n_splits):
+                chunks = list(chunk_tasks(input_type(range(num_args)), iterable_len=iter_len, chunk_size=chunk_size,
+                                          n_splits=n_splits))
+                expected_chunks = list(chunk_tasks(iter(range(num_args)), iterable_len=iter_len or num_args,
+                                                   chunk_size=chunk_size, n_splits=n_splits))
+                self.assertListEqual(chunks, expected_chunks)
+                for chunk in chunks:
+                    self.assertIsInstance(chunk, tuple)
+
 
 class ApplyNumpyChunkingTest(unittest.TestCase):
 
@@ -367,6 +412,157 @@ class MakeSingleArgumentsTest(unittest.TestCase):
             self.assertEqual(list(args_transformed), args_out)
 
 
+class SharedMemoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.shared_memory_class = get_shared_memory_class('spawn', use_dill=False, min_shm_size=1)
+        if self.shared_memory_class is None:
+            self.skipTest("Shared memory isn't supported on this platform")
+
+    def test_get_shared_memory_class(self):
+        """
+        Shared memory should only be used for processes on non-Windows systems and when it's enabled
+        """
+        for start_method, use_dill, min_shm_size in product(['fork', 'forkserver', 'spawn', 'threading'],
+                                                            [False, True], [None, 1, 1024]):
+            with self.subTest(start_method=start_method, use_dill=use_dill, min_shm_size=min_shm_size):
+                shared_memory_class = get_shared_memory_class(start_method, use_dill, min_shm_size)
+                if start_method == 'threading' or min_shm_size is None or RUNNING_WINDOWS:
+                    self.assertIsNone(shared_memory_class)
+                else:
+                    self.assertEqual(shared_memory_class.__module__,
+                                     'multiprocess.shared_memory' if use_dill else 'multiprocessing.shared_memory')
+
+    def test_share_and_load_numpy_arrays(self):
+        """
+        Only numpy arrays that are large enough should be shared. Loading them should give back the same arrays and
+        unlink the shared memory blocks
+        """
+        large_array = np.arange(1000, dtype=np.float64).reshape(100, 10)
+        small_array = np.arange(10, dtype=np.int8)
+        object_array = np.array([{'a': 1}] * 1000, dtype=object)
+        for args, n_shared in [(large_array, 1), ((large_array,), 1), ((0, (large_array, small_array)), 1),
+                               ({'x': large_array, 'y': 'a'}, 1), ((1, {'x': large_array, 'y': small_array}), 1),
+                               ({'x': (large_array, 1)}, 1), ({'y': {'z': large_array}}, 1),
+                               ((large_array, large_array[::2, 1:3], large_array[:30]), 2), (small_array, 0),
+                               (object_array, 0), ('foo', 0), ((1, 2, 3), 0)]:
+            with self.subTest(args=args):
+                # Large arrays should be replaced by a reference to shared memory
+                shared_args = self._assert_share_round_trip(args, n_shared)
+                self.assertEqual(str(shared_args).count('SharedNumpyArray'), n_shared)
+
+    def test_share_and_load_pickle_buffers(self):
+        """
+        Numpy arrays in other objects should be shared using out-of-band pickle buffers. Loading them should give back
+        the same objects and unlink the shared memory blocks
+        """
+        large_array = np.arange(1000, dtype=np.float64).reshape(100, 10)
+        small_array = np.arange(10, dtype=np.int8)
+        unpicklable = [lambda: 42, large_array]
+        for args, n_shared, n_pickled in [([large_array], 1, 1), ({'x': [large_array], 'y': 'a'}, 1, 1),
+                                          (([large_array, small_array, large_array[:30]],), 2, 1),
+                                          ([large_array.T], 1, 1),
+                                          ([small_array], 0, 0), ([1, 2.0, (3, 'foo')], 0, 0), ({1, 2, 3}, 0, 0),
+                                          ([large_array[::2]], 0, 0), (unpicklable, 0, 0),
+                                          (np.ma.masked_array(large_array), 0, 0),
+                                          ([np.ma.masked_array(large_array)], 0, 0)]:
+            with self.subTest(args=args):
+                # Objects with large arrays should be replaced by a reference to shared memory. Non-contiguous arrays
+                # are pickled in-band, so objects holding only those are left alone. The same goes for objects that
+                # can't contain large arrays and objects that can't be pickled
+                shared_args = self._assert_share_round_trip(args, n_shared, ForkingPickler)
+                self.assertEqual(str(shared_args).count('SharedPickle'), n_pickled)
+
+        # Without a pickler, other objects are left alone
+        with self.subTest(pickler=None):
+            shared_memory_names = []
+            args = [large_array]
+            self.assertIs(share_numpy_arrays(args, 1024, self.shared_memory_class, shared_memory_names), args)
+            self.assertEqual(shared_memory_names, [])
+
+    def test_load_persistent_numpy_arrays(self):
+        """
+        Persistent shared memory blocks can be loaded multiple times. They shouldn't be unlinked and the loaded arrays
+        should be read-only
+        """
+        large_array = np.arange(1000, dtype=np.float64).reshape(100, 10)
+        shared_memory_names = []
+        shared_args = share_numpy_arrays((large_array, 42, [large_array]), 1024, self.shared_memory_class,
+                                         shared_memory_names, ForkingPickler)
+        self.assertEqual(len(shared_memory_names), 2)
+
+        shared_memory_blocks = []
+        for _ in range(2):
+            loaded_args = load_shared_numpy_arrays(shared_args, self.shared_memory_class, shared_memory_blocks,
+                                                   persistent=True)
+            self._assert_args_equal(loaded_args, (large_array, 42, [large_array]))
+            self.assertFalse(loaded_args[0].flags.writeable)
+            self.assertFalse(loaded_args[2][0].flags.writeable)
+        self.assertEqual(len(shared_memory_blocks), 4)
+
+        del loaded_args
+        self.assertEqual(close_shared_memory(shared_memory_blocks), [])
+        unlink_shared_memory(shared_memory_names, self.shared_memory_class)
+        with self.assertRaises(FileNotFoundError):
+            self.shared_memory_class(name=shared_memory_names[0])
+
+    def test_unlink_shared_memory(self):
+        """
+        Shared memory blocks that haven't been loaded should be unlinked. Blocks that are already unlinked should be
+        ignored
+        """
+        shared_memory_names = []
+        shared_args = share_numpy_arrays((np.zeros(1024), np.zeros(1024)), 1024, self.shared_memory_class,
+                                         shared_memory_names)
+        self.assertIsInstance(shared_args[0], SharedNumpyArray)
+        self.assertIsInstance(shared_args[1], SharedNumpyArray)
+        shared_memory_blocks = []
+        load_shared_numpy_arrays(shared_args[0], self.shared_memory_class, shared_memory_blocks)
+        close_shared_memory(shared_memory_blocks)
+
+        unlink_shared_memory(shared_memory_names, self.shared_memory_class)
+        for name in shared_memory_names:
+            with self.assertRaises(FileNotFoundError):
+                self.shared_memory_class(name=name)
+
+    def _assert_share_round_trip(self, args, n_shared, pickler=None):
+        shared_memory_names = []
+        shared_args = share_numpy_arrays(args, 1024, self.shared_memory_class, shared_memory_names, pickler)
+        self.assertEqual(len(shared_memory_names), n_shared)
+
+        # Loading should give back the original arguments
+        shared_memory_blocks = []
+        loaded_args = load_shared_numpy_arrays(shared_args, self.shared_memory_class, shared_memory_blocks)
+        self.assertEqual(len(shared_memory_blocks), len(shared_memory_names))
+        self._assert_args_equal(loaded_args, args)
+
+        # Shared memory blocks should be unlinked, but can't be closed until the arrays are no longer in use
+        for name in shared_memory_names:
+            with self.assertRaises(FileNotFoundError):
+                self.shared_memory_class(name=name)
+        if shared_memory_blocks:
+            self.assertEqual(close_shared_memory(shared_memory_blocks), shared_memory_blocks)
+        del loaded_args
+        self.assertEqual(close_shared_memory(shared_memory_blocks), [])
+        return shared_args
+
+    def _assert_args_equal(self, args, expected_args):
+        self.assertEqual(type(args), type(expected_args))
+        if isinstance(expected_args, np.ndarray):
+            np.testing.assert_array_equal(args, expected_args)
+            self.assertEqual(args.dtype, expected_args.dtype)
+        elif isinstance(expected_args, (tuple, list)):
+            self.assertEqual(len(args), len(expected_args))
+            for arg, expected_arg in zip(args, expected_args):
+                self._assert_args_equal(arg, expected_arg)
+        elif isinstance(expected_args, dict):
+            self.assertEqual(args.keys(), expected_args.keys())
+            for key in expected_args:
+                self._assert_args_equal(args[key], expected_args[key])
+        else:
+            self.assertEqual(args, expected_args)
+
+
 class FormatSecondsTest(unittest.TestCase):
 
     def test_none_input(self):